@@ -51,14 +51,16 @@ async def bootstrap(
     # Use display_name from metadata if provided, else use from token
     final_display_name = extra.get("display_name") or token.get("name")
     
-    await bootstrap_user(
+    role = await bootstrap_user(
         uid=token["uid"],
         email=token["email"],
         role=request.role,
         display_name=final_display_name,
         extra=extra if extra else None,
+        claimed_role=token.get("role"),
     )
-    return {"status": "ok"}
+    # Tokens minted before this call lack the role claim; the client can force a refresh.
+    return {"status": "ok", "role": role}
 
 @router.post("/otp/send")
 async def send_otp(request: SendOtpRequest):
@@ -87,7 +89,7 @@ async def register_with_otp(request: RegisterOtpRequest):
         
         # Bootstrap
         extra = request.metadata or {}
-        await bootstrap_user(
+        role = await bootstrap_user(
             uid=uid,
             email=request.email,
             role=request.role,
@@ -98,8 +100,8 @@ async def register_with_otp(request: RegisterOtpRequest):
         # SUCCESS! Delete OTP now
         await delete_otp(request.email)
         
-        # Create custom token
-        custom_token = firebase_auth.create_custom_token(uid)
+        # Create custom token (the role claim rides along into the first ID token)
+        custom_token = firebase_auth.create_custom_token(uid, {"role": role})
         # Handle bytes vs str
         if isinstance(custom_token, bytes):
             custom_token = custom_token.decode("utf-8")
@@ -152,9 +154,9 @@ async def login_with_password(request: LoginPasswordRequest):
     """Login with email and password for returning users - Optimized"""
     from firebase_admin import auth as firebase_auth
     from fastapi import HTTPException
-    import httpx
     import time
     from app.core.config import settings
+    from app.core.http import get_http_client
     
     start_time = time.time()
     
@@ -174,9 +176,8 @@ async def login_with_password(request: LoginPasswordRequest):
     }
     
     try:
-        # 1. Verify credentials via REST API (Async)
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, timeout=10.0)
+        # 1. Verify credentials via REST API (Async, pooled keep-alive connection)
+        response = await get_http_client().post(url, json=payload, timeout=10.0)
             
         data = response.json()
         
@@ -2,24 +2,64 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, R
 import json
 from app.api.deps import student_only, get_current_user
 from app.services.book_service import donate_book, search_books, get_book, get_my_books, delete_book
-from app.db.storage import upload_file
+from app.services.text_search import book_text_index
+from app.db.storage import upload_images
 from app.db.firestore import get_blocked_uids
+from app.utils.exceptions import UploadTooLarge
 
 router = APIRouter()
 
+# Location search radius (km) when only lat/lon are given, and the widest allowed
+DEFAULT_RADIUS_KM = 10.0
+MAX_RADIUS_KM = 100.0
+
 
 @router.get("/search")
 async def search(request: Request, user=Depends(get_current_user)):
     filters = dict(request.query_params)
+    limit = filters.pop("limit", None)
+    cursor = filters.pop("cursor", None) or None
+    q = filters.pop("q", None) or None
+    lat = filters.pop("lat", None)
+    lon = filters.pop("lon", None)
+    radius_km = filters.pop("radius_km", None)
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="limit must be an integer")
+
+    near = None
+    if lat is not None or lon is not None:
+        try:
+            near = (float(lat), float(lon), float(radius_km or DEFAULT_RADIUS_KM))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="lat, lon and radius_km must be numbers")
+        if not (-90 <= near[0] <= 90 and -180 <= near[1] <= 180 and 0 < near[2] <= MAX_RADIUS_KM):
+            raise HTTPException(status_code=400, detail=f"Invalid location or radius (max {MAX_RADIUS_KM:.0f} km)")
+
     blocked_uids = []
     if user:
         blocked_uids = await get_blocked_uids(user["uid"])
         
-    return await search_books(
-        filters, 
-        exclude_uid=user["uid"] if user else None,
-        blocked_uids=blocked_uids
-    )
+    try:
+        return await search_books(
+            filters, 
+            exclude_uid=user["uid"] if user else None,
+            blocked_uids=blocked_uids,
+            limit=limit,
+            cursor=cursor,
+            q=q,
+            near=near,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/autocomplete")
+async def autocomplete(q: str = "", limit: int = 10):
+    """Query completions for the search box, e.g. 'ncert phy' -> 'ncert physics'"""
+    return {"suggestions": book_text_index.complete(q, min(limit, 25))}
 
 
 @router.get("/{book_id}")
@@ -56,23 +96,18 @@ async def donate(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid payload JSON")
         
-        urls = []
-        for img in images:
-            # Mock upload if in test mode (optional, but let's debug the real one first)
-            try:
-                url = await upload_file(
-                    await img.read(),
-                    "books",
-                    img.content_type,
-                )
-                urls.append(url)
-            except Exception as upload_err:
-                print(f"Upload error: {str(upload_err)}")
-                raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(upload_err)}")
-
-        book_id = await donate_book(user["uid"], payload_dict, urls)
+        try:
+            variants = await upload_images(images, "books")
+        except UploadTooLarge:
+            raise
+        except Exception as upload_err:
+            print(f"Upload error: {str(upload_err)}")
+            raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(upload_err)}")
+
+        urls = [v["full"] for v in variants]
+        book_id = await donate_book(user["uid"], payload_dict, urls, variants)
         return {"book_id": book_id}
-    except HTTPException:
+    except (HTTPException, UploadTooLarge):
         raise
     except Exception as e:
         print(f"Donate error: {str(e)}")
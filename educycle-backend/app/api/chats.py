@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
 from app.core.security import verify_firebase_token
+from app.core.token_verifier import token_verifier
+from app.services.chat_hub import chat_hub
 from app.services.chat_service import send_message, get_chat, get_chat_messages
 
 router = APIRouter()
 
+# Browsers can't set headers on a WebSocket, so they pass the ID token as a
+# subprotocol pair: new WebSocket(url, ["bearer", idToken]). Not as a query
+# parameter, which would land in proxy and server access logs.
+TOKEN_SUBPROTOCOL = "bearer"
+
 
 @router.get("/{chat_id}")
 async def get_chat_detail(chat_id: str, user=Depends(verify_firebase_token)):
@@ -15,13 +25,112 @@ async def get_chat_detail(chat_id: str, user=Depends(verify_firebase_token)):
 
 
 @router.get("/{chat_id}/messages")
-async def list_messages(chat_id: str, user=Depends(verify_firebase_token)):
-    """Get all messages in a chat"""
-    messages = await get_chat_messages(chat_id)
-    return messages
+async def list_messages(
+    chat_id: str,
+    after: str = None,
+    before: str = None,
+    limit: int = None,
+    user=Depends(verify_firebase_token),
+):
+    """
+    Get messages in a chat, oldest first. Without parameters returns the whole
+    history; `after=<message id>` returns only newer messages (for polling),
+    `before=<message id>&limit=N` the N messages before it (for scrolling back).
+    """
+    try:
+        return await get_chat_messages(chat_id, after=after, before=before, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/{chat_id}/message")
 async def message(chat_id: str, payload: dict, user=Depends(verify_firebase_token)):
     await send_message(chat_id, user["uid"], payload["message"])
     return {"sent": True}
+
+
+def _socket_token(websocket: WebSocket):
+    """(token, subprotocol to accept) from a Bearer header, else from the "bearer", <token> subprotocol pair."""
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials, None
+    protocols = websocket.scope.get("subprotocols", [])
+    if TOKEN_SUBPROTOCOL in protocols:
+        i = protocols.index(TOKEN_SUBPROTOCOL)
+        if i + 1 < len(protocols):
+            return protocols[i + 1], TOKEN_SUBPROTOCOL
+    return None, None
+
+
+async def _socket_user(token: str):
+    if not token:
+        return None
+    try:
+        return await token_verifier.verify(token)
+    except Exception:
+        return None
+
+
+@router.websocket("/{chat_id}/ws")
+async def chat_socket(websocket: WebSocket, chat_id: str):
+    """
+    Live messages for one chat, instead of polling /messages.
+
+    Each new message arrives as {"type": "message", "message": {...}}, in the
+    same shape /messages returns. Clients may also send {"message": "..."} to
+    post one; anything other than a text frame closes the socket with 1003.
+    Only the chat's participants can connect, authenticated by a Bearer
+    header or the "bearer" subprotocol (see TOKEN_SUBPROTOCOL). A client that
+    falls too far behind is closed with 1013; it should reconnect and fetch
+    /messages?after=<last message id> to catch up.
+    """
+    token, subprotocol = _socket_token(websocket)
+    user = await _socket_user(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid or expired Firebase token")
+        return
+    chat = await get_chat(chat_id)
+    if not chat or user["uid"] not in chat.get("users", []):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Not a participant in this chat")
+        return
+
+    await websocket.accept(subprotocol=subprotocol)
+    subscription = await chat_hub.join(chat_id, user["uid"])
+
+    async def write():
+        while True:
+            item = await subscription.get()
+            if item is None:
+                code = status.WS_1013_TRY_AGAIN_LATER if subscription.lagged else status.WS_1001_GOING_AWAY
+                await websocket.close(code=code)
+                return
+            await websocket.send_json({"type": "message", "message": item})
+
+    async def read():
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+            if frame.get("text") is None:
+                await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Expected a JSON text frame")
+                return
+            try:
+                payload = json.loads(frame["text"])
+            except ValueError:
+                continue  # ignore anything that isn't JSON
+            text = payload.get("message") if isinstance(payload, dict) else None
+            if isinstance(text, str) and text.strip():
+                await send_message(chat_id, user["uid"], text)
+
+    tasks = [asyncio.create_task(write()), asyncio.create_task(read())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, (WebSocketDisconnect, RuntimeError)):
+                print(f"Chat socket error in {chat_id}: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await chat_hub.leave(subscription)
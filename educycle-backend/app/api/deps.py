@@ -1,6 +1,6 @@
 from fastapi import Depends
 from app.core.security import verify_firebase_token
-from app.core.roles import require_role
+from app.core.roles import require_token_role
 
 
 async def get_current_user(token=Depends(verify_firebase_token)):
@@ -8,8 +8,8 @@ async def get_current_user(token=Depends(verify_firebase_token)):
 
 
 async def student_only(user=Depends(get_current_user)):
-    return await require_role(user["uid"], ["student"])
+    return await require_token_role(user, ["student"])
 
 
 async def ngo_only(user=Depends(get_current_user)):
-    return await require_role(user["uid"], ["ngo"])
+    return await require_token_role(user, ["ngo"])
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, B
 import json
 from app.api.deps import ngo_only, get_current_user
 from app.services.distribution_service import distribution_service
-from app.db.storage import upload_file
+from app.db.storage import upload_images
 from app.db.firestore import get_user_display_info
+from app.utils.exceptions import UploadTooLarge
 
 router = APIRouter()
 
@@ -30,18 +31,18 @@ async def create_event(
         ngo_name = ngo_info.get("name", "Verified NGO")
         
         # Upload images
-        image_urls = []
-        for img in images:
-            url = await upload_file(await img.read(), "distributions", img.content_type)
-            image_urls.append(url)
+        image_variants = await upload_images(images, "distributions")
             
         return await distribution_service.create_event(
             user["uid"],
             ngo_name,
             title,
             description,
-            image_urls
+            [v["full"] for v in image_variants],
+            image_variants,
         )
+    except UploadTooLarge:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
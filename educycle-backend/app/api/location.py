@@ -1,8 +1,12 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from app.services.location_service import geocode_address, find_nearby_ngos, reverse_geocode_coordinates
 
 router = APIRouter()
 
+# Radii tried, in order, when nothing is found within the requested radius
+EXPANSION_TIERS_KM = (20.0, 50.0)
+
 
 @router.get("/pickup-points")
 async def get_pickup_points(
@@ -19,8 +23,9 @@ async def get_pickup_points(
     """
     search_lat, search_lon = lat, lon
     detected_address = None
+    gps_provided = search_lat is not None and search_lon is not None
 
-    if search_lat is None or search_lon is None:
+    if not gps_provided:
         if not city or not area:
              # Fallback to IP Geolocation (Mocked for dev to Mumbai)
              # In a real app, use request.client.host with a geoip library
@@ -35,27 +40,29 @@ async def get_pickup_points(
                      search_lat, search_lon = await geocode_address(city)
             except Exception as e:
                  raise HTTPException(status_code=500, detail=f"Geocoding service unavailable: {str(e)}")
-    else:
-        # If lat/lon provided, reverse geocode to get city/area name for UI
-        detected_address = await reverse_geocode_coordinates(search_lat, search_lon)
              
     if search_lat is None or search_lon is None:
         raise HTTPException(status_code=404, detail="Could not identify location")
         
-    # Smart Search: Auto-expand radius if no NGOs found nearby
-    # Try requested radius first (default 5km)
-    ngos = await find_nearby_ngos(search_lat, search_lon, radius)
-    
-    expanded = False
-    if not ngos and radius < 20:
-        # Try 20km
-        ngos = await find_nearby_ngos(search_lat, search_lon, 20.0)
-        expanded = True
-        
-    if not ngos and radius < 50:
-        # Try 50km
-        ngos = await find_nearby_ngos(search_lat, search_lon, 50.0)
-        expanded = True
+    # Smart Search: one lookup at the widest tier, then auto-expand in memory.
+    # Try requested radius first (default 5km), then 20km, then 50km.
+    tiers = [radius] + [tier for tier in EXPANSION_TIERS_KM if tier > radius]
+    lookup = find_nearby_ngos(search_lat, search_lon, tiers[-1])
+
+    if gps_provided:
+        # If lat/lon provided, reverse geocode to get city/area name for UI (alongside the lookup)
+        detected_address, candidates = await asyncio.gather(
+            reverse_geocode_coordinates(search_lat, search_lon),
+            lookup,
+        )
+    else:
+        candidates = await lookup
+
+    # Apply the radius tiers to the distance-sorted candidates
+    for tier in tiers:
+        ngos = [ngo for ngo in candidates if ngo["distance_km"] <= tier]
+        if ngos:
+            break
 
     return {
         "user_location": {
@@ -64,5 +71,6 @@ async def get_pickup_points(
             "detected_address": detected_address
         },
         "pickup_points": ngos,
-        "search_expanded": expanded
+        "search_expanded": tier != radius,
+        "search_radius_km": tier if ngos else None,
     }
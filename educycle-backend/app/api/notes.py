@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 import json
 from app.api.deps import student_only
 from app.services.note_service import upload_note, list_notes, delete_note
+from app.services.text_search import note_search
 from app.db.storage import upload_file
 
 router = APIRouter()
@@ -18,17 +19,13 @@ async def upload(
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid payload JSON")
     
-    url = await upload_file(
-        await file.read(),
-        "notes",
-        file.content_type,
-    )
+    url = await upload_file(file, "notes")
     note_id = await upload_note(user["uid"], payload_dict, url)
     return {"note_id": note_id}
 
 
 @router.get("/")
-async def list_all(subject: str = None, class_level: str = None, owner_uid: str = None):
+async def list_all(subject: str = None, class_level: str = None, owner_uid: str = None, q: str = None):
     filters = {}
     if subject:
         filters["subject"] = subject
@@ -36,7 +33,13 @@ async def list_all(subject: str = None, class_level: str = None, owner_uid: str
         filters["class_level"] = class_level
     if owner_uid:
         filters["owner_uid"] = owner_uid
-    return await list_notes(filters)
+    return await list_notes(filters, q)
+
+
+@router.get("/autocomplete")
+async def autocomplete(q: str = "", limit: int = 10):
+    """Query completions for the notes search box"""
+    return {"suggestions": await note_search.complete(q, min(limit, 25))}
 
 
 
@@ -16,7 +16,7 @@ async def list_notifications(user=Depends(get_current_user)):
                  .stream()
         
         results = []
-        for doc in docs:
+        async for doc in docs:
             data = doc.to_dict()
             # Convert timestamp to ISO string
             if "timestamp" in data:
@@ -38,7 +38,7 @@ async def list_notifications(user=Depends(get_current_user)):
 async def mark_read(notification_id: str, user=Depends(get_current_user)):
     """Mark a notification as read"""
     doc_ref = db.collection("notifications").document(notification_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Notification not found")
@@ -46,7 +46,7 @@ async def mark_read(notification_id: str, user=Depends(get_current_user)):
     if doc.to_dict()["user_uid"] != user["uid"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    doc_ref.update({"read": True})
+    await doc_ref.update({"read": True})
     return {"status": "success"}
 
 @router.post("/read-all-chat/{chat_id}")
@@ -60,11 +60,11 @@ async def mark_chat_read(chat_id: str, user=Depends(get_current_user)):
     
     batch = db.batch()
     count = 0
-    for doc in docs:
+    async for doc in docs:
         batch.update(doc.reference, {"read": True})
         count += 1
     
     if count > 0:
-        batch.commit()
+        await batch.commit()
     
     return {"status": "success", "count": count}
@@ -18,6 +18,80 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: str = ""
     EMAILS_FROM_NAME: str = "EduCycle"
 
+    # Firestore client: "async" uses the native AsyncClient, "sync" runs the
+    # blocking client on a bounded thread pool so it never stalls the event loop.
+    FIRESTORE_CLIENT_MODE: str = "async"
+    FIRESTORE_THREADPOOL_SIZE: int = 16
+
+    # In-process cache for users/{uid} profile reads
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL_SECONDS: float = 60.0
+
+    # Verified Firebase ID tokens kept in memory until they expire
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # Shared outbound HTTP client (identitytoolkit, Nominatim, Google certs)
+    HTTP2_ENABLED: bool = False
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_NOMINATIM_MAX_CONNECTIONS: int = 2
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+
+    # Upload size limits, enforced while the file is streamed to storage
+    UPLOAD_MAX_IMAGE_MB: int = 10
+    UPLOAD_MAX_PDF_MB: int = 25
+    UPLOAD_MAX_OTHER_MB: int = 10
+    # Concurrent uploads for one multi-image request, and across the process
+    UPLOAD_CONCURRENCY_PER_REQUEST: int = 4
+    UPLOAD_CONCURRENCY_GLOBAL: int = 16
+    # Storage backends: "firebase", "s3" (needs boto3) or "local"; "" disables
+    # the fallback. After STORAGE_FAILURE_THRESHOLD consecutive failures uploads
+    # skip the primary until a background probe finds it healthy again.
+    STORAGE_PRIMARY: str = "firebase"
+    STORAGE_FALLBACK: str = "local"
+    STORAGE_FAILURE_THRESHOLD: int = 3
+    STORAGE_PROBE_INTERVAL_SECONDS: float = 30.0
+    # S3-compatible bucket; endpoint for MinIO/R2 etc., public URL if served via a CDN
+    S3_BUCKET: str = ""
+    S3_ENDPOINT_URL: str = ""
+    S3_REGION: str = ""
+    S3_PUBLIC_URL: str = ""
+    # Processes that resize/encode photos into WebP variants (0 = one per CPU)
+    IMAGE_WORKERS: int = 2
+
+    # NGO pickup-point lookup: "geohash" reads only the cells covering the
+    # search radius (needs the users(role, geohash) index); "memory" answers from
+    # in-process NumPy arrays refreshed every NGO_INDEX_REFRESH_SECONDS;
+    # "scan" reads all NGOs.
+    NGO_LOOKUP_MODE: str = "geohash"
+    NGO_INDEX_REFRESH_SECONDS: float = 300.0
+
+    # Geocoding: Nominatim endpoint, request pacing and the local result cache
+    NOMINATIM_BASE_URL: str = "https://nominatim.openstreetmap.org"
+    NOMINATIM_MIN_INTERVAL_SECONDS: float = 1.0
+    GEOCODE_CACHE_PATH: str = "geocode_cache.sqlite3"
+    GEOCODE_MEMORY_CACHE_SIZE: int = 5000
+    GEOCODE_CACHE_TTL_SECONDS: float = 30 * 24 * 3600
+    GEOCODE_NEGATIVE_TTL_SECONDS: float = 24 * 3600
+    # Background tasks that geocode NGOs missing coordinates
+    GEOCODING_WORKERS: int = 1
+
+    # Book search: in-memory catalog of available books fed by a Firestore
+    # snapshot listener (falls back to Firestore queries when disabled or not
+    # yet loaded), and how long donor ranking summaries are reused.
+    BOOK_CATALOG_ENABLED: bool = True
+    DONOR_CACHE_TTL_SECONDS: float = 30.0
+    # Ranked results per filter set; dropped on any book write, TTL is a backstop
+    SEARCH_CACHE_SIZE: int = 512
+    SEARCH_CACHE_TTL_SECONDS: float = 60.0
+    # Chat WebSockets: messages buffered per socket before a slow client is
+    # disconnected (it reconnects and re-fetches history)
+    CHAT_SOCKET_QUEUE_SIZE: int = 100
+    # Notes text index reload interval (picks up notes written by other instances)
+    NOTE_INDEX_REFRESH_SECONDS: float = 300.0
+
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".env"),
         env_file_encoding="utf-8",
@@ -0,0 +1,62 @@
+import httpx
+from app.core.config import settings
+
+IDENTITY_TOOLKIT_ORIGIN = "https://identitytoolkit.googleapis.com"
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    if not settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("HTTP2_ENABLED is set but the 'h2' package is not installed; using HTTP/1.1.")
+        return False
+    return True
+
+
+def _transport(max_connections: int, http2: bool) -> httpx.AsyncHTTPTransport:
+    return httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+def _build_client() -> httpx.AsyncClient:
+    http2 = _http2_available()
+    return httpx.AsyncClient(
+        transport=_transport(settings.HTTP_MAX_CONNECTIONS, http2),
+        # Per-host pools so one slow upstream can't starve the others.
+        mounts={
+            IDENTITY_TOOLKIT_ORIGIN: _transport(settings.HTTP_MAX_CONNECTIONS_PER_HOST, http2),
+            settings.NOMINATIM_BASE_URL: _transport(settings.HTTP_NOMINATIM_MAX_CONNECTIONS, http2),
+        },
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The application-wide pooled client. Opened and closed by the FastAPI
+    lifespan; scripts that run outside the app get one created on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -18,3 +18,21 @@ async def require_role(uid: str, allowed_roles: list[str]):
         )
 
     return user
+
+
+async def require_token_role(token: dict, allowed_roles: list[str]):
+    """
+    Authorize from the `role` custom claim on a decoded ID token. Legacy
+    accounts whose tokens predate the claim fall back to the profile lookup.
+    """
+    role = token.get("role")
+    if role is None:
+        return await require_role(token["uid"], allowed_roles)
+
+    if role not in allowed_roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied for this role",
+        )
+
+    return token
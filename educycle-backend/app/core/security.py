@@ -1,6 +1,6 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from firebase_admin import auth
+from app.core.token_verifier import token_verifier
 
 security = HTTPBearer()
 
@@ -11,7 +11,7 @@ async def verify_firebase_token(
     token = credentials.credentials
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await token_verifier.verify(token)
         return decoded_token
     except Exception:
         raise HTTPException(
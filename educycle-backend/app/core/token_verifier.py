@@ -0,0 +1,125 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import time
+
+from firebase_admin import auth
+from google.auth import jwt as google_jwt
+
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.utils.cache import TTLCache
+
+CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+DEFAULT_CERTS_MAX_AGE = 3600
+# An unknown `kid` comes from an unverified header, so refetching the certs for
+# one is allowed at most this often; otherwise anyone could make us hit Google.
+FORCED_REFRESH_MIN_INTERVAL = 60
+
+
+def _unverified_header(token: str) -> dict:
+    segment = token.split(".", 1)[0]
+    segment += "=" * (-len(segment) % 4)
+    return json.loads(base64.urlsafe_b64decode(segment))
+
+
+def _max_age(headers) -> int:
+    match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+    max_age = int(match.group(1)) if match else DEFAULT_CERTS_MAX_AGE
+    return max(0, max_age - int(headers.get("age", 0) or 0))
+
+
+class FirebaseTokenVerifier:
+    """
+    Verifies Firebase ID tokens locally.
+
+    Google's signing certs are cached for as long as their Cache-Control allows,
+    signature checks run in a worker thread, and tokens that already passed are
+    remembered (keyed by SHA-256 of the token) until they expire, so repeat
+    requests from the same session skip the crypto entirely.
+    """
+
+    def __init__(self, project_id: str, cache_size: int = 10000):
+        self.project_id = project_id
+        self._certs = {}
+        self._certs_expire_at = 0.0
+        self._certs_lock = asyncio.Lock()
+        self._last_forced_refresh = None
+        self._verified = TTLCache(maxsize=cache_size, ttl=3600)
+        self.signature_checks = 0
+
+    def _forced_refresh_allowed(self):
+        return (self._last_forced_refresh is None
+                or time.monotonic() - self._last_forced_refresh >= FORCED_REFRESH_MIN_INTERVAL)
+
+    async def _get_certs(self, force: bool = False):
+        if not force and self._certs and time.monotonic() < self._certs_expire_at:
+            return self._certs
+        if force and not self._forced_refresh_allowed():
+            return self._certs
+
+        async with self._certs_lock:
+            if force:
+                if not self._forced_refresh_allowed():
+                    return self._certs  # another request just refreshed them
+                self._last_forced_refresh = time.monotonic()
+            elif self._certs and time.monotonic() < self._certs_expire_at:
+                return self._certs
+            res = await get_http_client().get(CERTS_URL)
+            res.raise_for_status()
+            self._certs = res.json()
+            self._certs_expire_at = time.monotonic() + _max_age(res.headers)
+        return self._certs
+
+    def _verify_signed(self, token: str, certs: dict) -> dict:
+        self.signature_checks += 1
+        decoded = google_jwt.decode(token, certs=certs, audience=self.project_id)
+
+        if decoded.get("iss") != ISSUER_PREFIX + self.project_id:
+            raise ValueError("Firebase ID token has an incorrect issuer")
+        sub = decoded.get("sub")
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise ValueError("Firebase ID token has an invalid subject")
+        auth_time = decoded.get("auth_time")
+        if not isinstance(auth_time, (int, float)) or auth_time > time.time():
+            raise ValueError("Firebase ID token has an invalid auth_time")
+
+        decoded["uid"] = sub
+        return decoded
+
+    async def verify(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        cached = self._verified.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        if os.environ.get("FIREBASE_AUTH_EMULATOR_HOST"):
+            # Emulator tokens are unsigned; let the SDK handle them.
+            decoded = await asyncio.to_thread(auth.verify_id_token, token)
+        else:
+            kid = _unverified_header(token).get("kid")
+            certs = await self._get_certs()
+            if kid not in certs:
+                # Google rotated its keys before our cached copy expired (rate-limited).
+                certs = await self._get_certs(force=True)
+                if kid not in certs:
+                    raise ValueError("Firebase ID token has an unknown key id")
+            decoded = await asyncio.to_thread(self._verify_signed, token, certs)
+
+        ttl = decoded["exp"] - time.time()
+        if ttl > 0:
+            self._verified.set(key, decoded, ttl=ttl)
+        return dict(decoded)
+
+    def stats(self):
+        return {**self._verified.stats(), "signature_checks": self.signature_checks}
+
+
+token_verifier = FirebaseTokenVerifier(
+    settings.FIREBASE_PROJECT_ID,
+    cache_size=settings.TOKEN_CACHE_SIZE,
+)
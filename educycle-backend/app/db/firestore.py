@@ -1,20 +1,212 @@
-from app.core.firebase import get_firestore
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-db = get_firestore()
+from google.cloud.firestore_v1 import async_transactional, transactional
+
+from app.core.config import settings
+from app.core.firebase import get_firestore, get_firestore_async
+from app.utils.cache import TTLCache
+
+# Calls that make a Firestore round trip and must be awaited.
+_IO_METHODS = frozenset({"get", "set", "create", "update", "delete", "add", "commit"})
+# On a write batch only commit() talks to the server; set/update/delete just queue writes.
+_BATCH_IO_METHODS = frozenset({"commit"})
+# Max document references per get_all() round trip.
+GET_ALL_CHUNK_SIZE = 100
+
+# Calls that return an iterator of snapshots (async generators on the AsyncClient).
+_STREAM_METHODS = frozenset({"stream", "get_all"})
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FIRESTORE_THREADPOOL_SIZE,
+            thread_name_prefix="firestore",
+        )
+    return _executor
+
+
+def _unwrap(value):
+    if isinstance(value, ThreadedFirestore):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+async def _run(fn, *args, **kwargs):
+    args = _unwrap(args)
+    kwargs = {k: _unwrap(v) for k, v in kwargs.items()}
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(fn, *args, **kwargs))
+
+
+async def _stream(fn, *args, **kwargs):
+    # Drain the blocking iterator on the pool, then hand snapshots back on the loop.
+    snapshots = await _run(lambda *a, **kw: list(fn(*a, **kw)), *args, **kwargs)
+    for snapshot in snapshots:
+        yield snapshot
+
+
+class ThreadedFirestore:
+    """
+    Wraps the synchronous Firestore client (and the references, queries and
+    batches it hands out) so it exposes the same awaitable surface as the
+    AsyncClient. Every round trip runs on a bounded thread pool.
+    """
+
+    __slots__ = ("_target", "_io_methods")
+
+    def __init__(self, target, io_methods=_IO_METHODS):
+        self._target = target
+        self._io_methods = io_methods
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        if name in _STREAM_METHODS:
+            return partial(_stream, attr)
+        if name in self._io_methods:
+            return partial(_run, attr)
+
+        def chain(*args, **kwargs):
+            result = attr(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()})
+            if result is None:
+                return None
+            return ThreadedFirestore(result, _BATCH_IO_METHODS if name == "batch" else _IO_METHODS)
+
+        return chain
+
+
+def build_client(mode: str):
+    if mode == "async":
+        return get_firestore_async()
+    if mode == "sync":
+        return ThreadedFirestore(get_firestore())
+    raise ValueError(f"Unknown FIRESTORE_CLIENT_MODE: {mode!r} (expected 'async' or 'sync')")
+
+
+db = build_client(settings.FIRESTORE_CLIENT_MODE)
+
+# Returned by an update_document() callback to delete the document
+DELETE_DOCUMENT = object()
+
+
+async def update_document(ref, update):
+    """
+    Read-modify-write one document in a transaction (retried on contention,
+    so `update` must be free of side effects). `update(data)` gets the
+    current fields (None if the document doesn't exist) and returns
+    (new_fields, result): a dict replaces the document, DELETE_DOCUMENT
+    deletes it, None leaves it unchanged. Returns `result`.
+    """
+    def apply(transaction, snapshot, target):
+        new_fields, result = update(snapshot.to_dict() if snapshot.exists else None)
+        if new_fields is DELETE_DOCUMENT:
+            transaction.delete(target)
+        elif new_fields is not None:
+            transaction.set(target, new_fields)
+        return result
+
+    if isinstance(ref, ThreadedFirestore):
+        target = ref._target
+
+        @transactional
+        def run(transaction):
+            return apply(transaction, target.get(transaction=transaction), target)
+
+        return await _run(run, db._target.transaction())
+
+    @async_transactional
+    async def run(transaction):
+        return apply(transaction, await ref.get(transaction=transaction), ref)
+
+    return await run(db.transaction())
+
+
+_profile_cache = TTLCache(
+    maxsize=settings.PROFILE_CACHE_SIZE,
+    ttl=settings.PROFILE_CACHE_TTL_SECONDS,
+)
+# uid -> [profile reads in flight, generation]. invalidate_user() bumps the
+# generation so a read that was in flight during a write doesn't put the old
+# profile back in the cache; the entry goes when its last read finishes.
+_profile_fetches = {}
+
+
+def invalidate_user(uid: str):
+    """Drop a cached profile. Call after any write to users/{uid}."""
+    fetch = _profile_fetches.get(uid)
+    if fetch is not None:
+        fetch[1] += 1
+    _profile_cache.invalidate(uid)
+
+
+def get_profile_cache_stats():
+    return _profile_cache.stats()
 
 
 async def get_user_by_uid(uid: str):
-    doc = db.collection("users").document(uid).get()
-    if doc.exists:
-        return doc.to_dict()
-    return None
+    profile = _profile_cache.get(uid)
+    if profile is None:
+        fetch = _profile_fetches.setdefault(uid, [0, 0])
+        fetch[0] += 1
+        generation = fetch[1]
+        try:
+            doc = await db.collection("users").document(uid).get()
+        finally:
+            fetch[0] -= 1
+            if not fetch[0]:
+                del _profile_fetches[uid]
+        if not doc.exists:
+            return None
+        profile = doc.to_dict()
+        if fetch[1] == generation:
+            _profile_cache.set(uid, profile)
+    # Callers may mutate what they get back, nested lists and maps included;
+    # keep the cached copy pristine.
+    return copy.deepcopy(profile)
+
+
+async def get_users_fields(uids, fields: list[str]):
+    """
+    Fetch only `fields` for many users at once. Cached profiles are served from
+    memory; the rest are read with field-masked get_all() calls, one per chunk
+    of GET_ALL_CHUNK_SIZE uids, issued concurrently. Returns {uid: dict}.
+    """
+    found = {}
+    missing = []
+    for uid in dict.fromkeys(u for u in uids if u):
+        profile = _profile_cache.get(uid)
+        if profile is None:
+            missing.append(uid)
+        else:
+            found[uid] = {f: copy.deepcopy(profile[f]) for f in fields if f in profile}
+
+    async def fetch(chunk):
+        refs = [db.collection("users").document(uid) for uid in chunk]
+        return [snap async for snap in db.get_all(refs, field_paths=fields)]
+
+    chunks = [missing[i:i + GET_ALL_CHUNK_SIZE] for i in range(0, len(missing), GET_ALL_CHUNK_SIZE)]
+    for snapshots in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+        for snap in snapshots:
+            if snap.exists:
+                found[snap.id] = snap.to_dict()
+    return found
 
 
 async def create_user_if_not_exists(uid: str, data: dict):
     ref = db.collection("users").document(uid)
-    doc = ref.get()
+    doc = await ref.get()
     if not doc.exists:
-        ref.set(data)
+        await ref.set(data)
     else:
         # Update existing user, but preserve existing fields that aren't being updated
         # For NGO, always update organization_name, city, and area if provided (to fix missing data)
@@ -29,19 +221,21 @@ async def create_user_if_not_exists(uid: str, data: dict):
                     existing_value = doc.to_dict().get(k)
                     if existing_value is None:
                         update_data[k] = v
-        
+
         if update_data:
-            ref.update(update_data)
+            await ref.update(update_data)
+
+    invalidate_user(uid)
 
 
 async def get_user_display_info(uid: str):
     user = await get_user_by_uid(uid)
     if not user:
         return {"name": "Unknown User", "location": "Unknown Location"}
-    
+
     name = user.get("organization_name") or user.get("display_name") or user.get("email", "Anonymous")
     location = f"{user.get('area', '')}, {user.get('city', '')}".strip(", ") or "Location not specified"
-    
+
     return {"name": name, "location": location}
 
 
@@ -50,4 +244,3 @@ async def get_blocked_uids(uid: str):
     if not user:
         return []
     return user.get("blocked_uids", [])
-
@@ -1,28 +1,401 @@
-from app.core.firebase import get_storage_bucket
-import uuid
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
+from app.core.config import settings
+from app.db.firestore import DELETE_DOCUMENT, db, update_document
+from app.db.storage_backends import CHUNK_SIZE, storage_backends
+from google.cloud.firestore_v1 import Increment
+from app.utils.exceptions import UploadTooLarge
+from app.utils.images import VARIANTS, make_variants
 
-async def upload_file(file_bytes: bytes, path: str, content_type: str):
+# Caps uploads in flight across all requests (each holds a worker thread)
+_upload_slots = asyncio.Semaphore(settings.UPLOAD_CONCURRENCY_GLOBAL)
+# Process-wide dedup counters, reported in /health/stats
+_storage_stats = {"uploads": 0, "deduplicated": 0, "bytes_written": 0, "bytes_saved": 0}
+
+# An upload that finds its object being deleted polls until the deletion is
+# done; a deletion older than DELETE_STALE_SECONDS is assumed dead and taken over.
+DELETE_POLL_SECONDS = 0.2
+DELETE_STALE_SECONDS = 60
+
+# WebP encoding is CPU-bound, so it runs in worker processes (created on first use)
+_image_pool = None
+
+
+def max_upload_bytes(content_type: str) -> int:
+    content_type = (content_type or "").lower()
+    if content_type.startswith("image/"):
+        return settings.UPLOAD_MAX_IMAGE_MB * 1024 * 1024
+    if content_type == "application/pdf":
+        return settings.UPLOAD_MAX_PDF_MB * 1024 * 1024
+    return settings.UPLOAD_MAX_OTHER_MB * 1024 * 1024
+
+
+class LimitedReader(io.RawIOBase):
+    """Read-only view of a file object that raises UploadTooLarge once more than `limit` bytes pass through."""
+
+    def __init__(self, raw, content_type: str, limit: int):
+        self._raw = raw
+        self._content_type = content_type
+        self._limit = limit
+        self._start = raw.tell() if raw.seekable() else 0
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self._raw.seekable()
+
+    def tell(self):
+        return self.bytes_read
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        # Absolute seeks only: rewinds (retries, local fallback) and resumable
+        # uploads, which seek to the bytes already sent after a failed chunk.
+        if whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("LimitedReader only supports absolute seeks")
+        if offset < 0 or offset > self._limit:
+            raise ValueError(f"Seek position {offset} is outside 0..{self._limit}")
+        self._raw.seek(self._start + offset)
+        self.bytes_read = offset
+        return offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._limit + 1 - self.bytes_read
+        data = self._raw.read(min(size, self._limit + 1 - self.bytes_read) if size else 0)
+        self.bytes_read += len(data)
+        if self.bytes_read > self._limit:
+            raise UploadTooLarge(self._content_type, self._limit)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _hash_stream(reader: LimitedReader):
+    """(sha256 hex, size) of the stream, read in chunks, then rewound for the upload."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    size = reader.bytes_read
+    reader.seek(0)
+    return digest.hexdigest(), size
+
+
+def _digest(url: str):
+    """SHA-256 a content-addressed URL is named by (its storage_refs id), or None for legacy uuid-named files."""
+    name = url.rsplit("/", 1)[-1].split(".", 1)[0]
+    if len(name) != 64 or any(c not in "0123456789abcdef" for c in name):
+        return None
+    return name
+
+
+async def _acquire_ref(digest: str, size: int, content_type: str, path: str):
+    """
+    Take one reference to `digest` before its object is looked up or written.
+    Returns True if the object must be rewritten even if it exists (a stalled
+    deletion was taken over and may have removed it). If a deletion is in
+    progress, waits for it to finish so the object is written again after it.
+    """
+    def update(data):
+        now = time.time()
+        if data is None:
+            return {"refs": 1, "size": size, "content_type": content_type, "urls": {}, "paths": [path],
+                    "bytes_saved": 0, "deleting_since": None}, False
+        if data.get("deleting_since"):
+            if now - data["deleting_since"] < DELETE_STALE_SECONDS:
+                return None, None  # wait for the deleter
+            # The deleter died mid-way: claim the record, its objects may be gone
+            return {**data, "refs": 1, "urls": {}, "paths": [path], "deleting_since": None}, True
+        paths = data.get("paths", [])
+        return {**data, "refs": data.get("refs", 0) + 1,
+                "paths": paths if path in paths else paths + [path]}, False
+
+    ref = db.collection("storage_refs").document(digest)
+    while True:
+        rewrite = await update_document(ref, update)
+        if rewrite is not None:
+            return rewrite
+        await asyncio.sleep(DELETE_POLL_SECONDS)
+
+
+async def _release_ref(digest: str, url: str = None):
+    """
+    Drop one reference to `digest`. The last one marks the record as
+    deleting (so concurrent uploads wait instead of reusing the object),
+    deletes the object from every backend that holds it, then removes the
+    record.
+    """
+    ref = db.collection("storage_refs").document(digest)
+    started = time.time()
+
+    def release(data):
+        if data is None:
+            return None, ("missing", None)
+        if data.get("deleting_since"):
+            return None, ("deleting", None)  # over-release while it's already going
+        refs = data.get("refs", 0) - 1
+        if refs > 0:
+            return {**data, "refs": refs}, ("kept", None)
+        return {**data, "refs": 0, "deleting_since": started}, ("delete", data)
+
+    state, data = await update_document(ref, release)
+    if state == "missing" and url:
+        print(f"No storage reference for {url}; leaving the object in place.")
+    if state != "delete":
+        return
+
+    urls = set(data.get("urls", {}).values()) | ({url} if url else set())
+    try:
+        for stored_url in urls:
+            await storage_backends.delete(stored_url)
+    except BaseException:
+        # Give the record back so the object can still be reused or deleted later
+        await update_document(ref, lambda d: ({**d, "deleting_since": None}, None) if d else (None, None))
+        raise
+
+    def finish(data):
+        if data is not None and data.get("deleting_since") == started:
+            return DELETE_DOCUMENT, None
+        return None, None
+
+    await update_document(ref, finish)
+
+
+async def _record_upload(digest: str, url: str, size: int, written: bool):
+    """Note which backend holds the object, and the dedup counters; never fails the upload itself."""
+    _storage_stats["uploads"] += 1
+    if written:
+        _storage_stats["bytes_written"] += size
+    else:
+        _storage_stats["deduplicated"] += 1
+        _storage_stats["bytes_saved"] += size
+
+    fields = {f"urls.{storage_backends.backend_for(url).name}": url}
+    if not written:
+        fields["bytes_saved"] = Increment(size)
     try:
-        bucket = get_storage_bucket()
-        filename = f"{path}/{uuid.uuid4()}"
-        blob = bucket.blob(filename)
-    
-        blob.upload_from_string(file_bytes, content_type=content_type)
-        blob.make_public()
-    
-        return blob.public_url
+        await db.collection("storage_refs").document(digest).update(fields)
     except Exception as e:
-        print(f"Firebase Storage failed ({e}), falling back to local storage.")
-        # Local storage fallback
-        filename = f"{uuid.uuid4()}_{path.replace('/', '_')}.{content_type.split('/')[-1] if '/' in content_type else 'bin'}"
-        local_path = f"app/static/uploads/{filename}"
-        
-        # Ensure dir exists (redundant but safe)
-        import os
-        os.makedirs("app/static/uploads", exist_ok=True)
-        
-        with open(local_path, "wb") as f:
-            f.write(file_bytes)
-            
-        return f"http://localhost:8000/static/uploads/{filename}"
+        print(f"Could not record storage location for {url}: {e}")
+
+
+def get_storage_stats():
+    return {**_storage_stats, "backends": storage_backends.stats()}
+
+
+async def upload_file(file, path: str, content_type: str = None):
+    """
+    Store an upload and return its public URL.
+
+    `file` is a FastAPI UploadFile (streamed from its spooled temp file in
+    CHUNK_SIZE pieces, never read into memory whole) or raw bytes. Raises
+    UploadTooLarge as soon as the stream passes the limit for its type.
+
+    Storage is content-addressed: the object is named by its SHA-256 alone
+    (`path` is only recorded on the reference), so an identical upload from
+    any feature returns the existing URL without writing again. Every upload
+    takes a reference in storage_refs/{sha256} before touching the object;
+    delete_file() removes the object only when the last reference goes, and
+    an upload racing that deletion waits and writes it again. Which backend stores it
+    (primary, or the fallback while the primary is failing) is decided by
+    storage_backends; see app/db/storage_backends.py.
+    """
+    if isinstance(file, (bytes, bytearray)):
+        raw = io.BytesIO(file)
+        size = len(file)
+    else:
+        content_type = content_type or file.content_type
+        raw = file.file
+        size = getattr(file, "size", None)
+    content_type = content_type or "application/octet-stream"
+
+    limit = max_upload_bytes(content_type)
+    if size is not None and size > limit:
+        raise UploadTooLarge(content_type, limit)
+    reader = LimitedReader(raw, content_type, limit)
+    # Hashing pass over the local spool (also enforces the limit) before anything is sent
+    digest, size = await asyncio.to_thread(_hash_stream, reader)
+
+    rewrite = await _acquire_ref(digest, size, content_type, path)
+    try:
+        url, written = await storage_backends.put(reader, content_type, digest, overwrite=rewrite)
+    except BaseException:
+        await _release_ref(digest)
+        raise
+    await _record_upload(digest, url, size, written)
+    return url
+
+
+async def delete_file(url: str):
+    """
+    Drop one reference to a file stored by upload_file, given the URL it
+    returned; the object itself is removed when no references remain.
+    """
+    digest = _digest(url)
+    if digest is None:
+        await storage_backends.delete(url)  # stored before content addressing
+        return
+    await _release_ref(digest, url)
+
+
+def stored_file_urls(data: dict) -> list[str]:
+    """
+    Every upload URL a book, note or distribution event document holds, once
+    per reference it owns: its `file_url` and each `image_variants` URL
+    (`image_urls` only repeats the full-size variants).
+    """
+    urls = [data["file_url"]] if data.get("file_url") else []
+    variants = data.get("image_variants")
+    if variants is None:
+        variants = [{"full": url} for url in data.get("image_urls", [])]
+    for variant in variants:
+        urls.extend(url for url in variant.values() if url)
+    return urls
+
+
+async def delete_files(urls: list[str]):
+    """
+    delete_file() for each URL, once the document that referenced them is
+    gone. Failures are logged rather than raised; the delete already happened.
+    """
+    results = await asyncio.gather(*(delete_file(url) for url in urls), return_exceptions=True)
+    for url, outcome in zip(urls, results):
+        if isinstance(outcome, BaseException):
+            print(f"Could not release {url}: {outcome}")
+
+
+def _get_image_pool():
+    global _image_pool
+    if _image_pool is None:
+        # spawn, not fork: forking a process that has gRPC (Firestore) threads running is unsafe
+        _image_pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS or None,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _image_pool
+
+
+def shutdown_image_pool():
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(cancel_futures=True)
+        _image_pool = None
+
+
+def _discard_image_pool(pool):
+    """Drop a pool whose worker died; the next _get_image_pool() starts a fresh one."""
+    global _image_pool
+    if _image_pool is pool:
+        _image_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _make_variants(data: bytes):
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = _get_image_pool()
+        try:
+            return await loop.run_in_executor(pool, make_variants, data)
+        except BrokenProcessPool:
+            # A worker was killed (OOM, crash); every later submit to this pool
+            # would fail too. Replace it and retry once.
+            _discard_image_pool(pool)
+            if attempt:
+                raise
+
+
+async def upload_image(file, path: str):
+    """
+    Store a photo as WebP thumb/card/full variants (see app/utils/images.py)
+    and return {variant: url}. Encoding runs in the image process pool. Files
+    Pillow can't decode are stored as uploaded, under every variant name.
+    """
+    content_type = file.content_type if not isinstance(file, (bytes, bytearray)) else "image/jpeg"
+    raw = io.BytesIO(file) if isinstance(file, (bytes, bytearray)) else file.file
+    limit = max_upload_bytes(content_type)
+    # Decoding needs the whole image in memory anyway; the limit still applies while reading.
+    data = await asyncio.to_thread(LimitedReader(raw, content_type, limit).read)
+
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        variants = await _make_variants(data)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        print(f"Image could not be decoded ({e}), storing the original.")
+        # One reference per variant name, as each is released on its own later
+        urls = {}
+        try:
+            for name in VARIANTS:
+                urls[name] = await upload_file(data, path, content_type)
+        except BaseException as error:
+            await _raise_after_cleanup([urls, error])
+        return urls
+
+    names = list(variants)
+    results = await asyncio.gather(
+        *(upload_file(variants[name], f"{path}/{name}", "image/webp") for name in names),
+        return_exceptions=True,
+    )
+    await _raise_after_cleanup(results)
+    return dict(zip(names, results))
+
+
+def _uploaded_urls(result):
+    """URLs an upload result holds, one per reference taken (identical variants included)."""
+    if isinstance(result, str):
+        return [result]
+    if isinstance(result, dict):
+        return list(result.values())
+    return []
+
+
+async def _raise_after_cleanup(results: list):
+    """If any result is an exception, delete everything that did upload and raise the first error."""
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if not errors:
+        return
+
+    uploaded = [url for r in results for url in _uploaded_urls(r)]
+    cleanup = await asyncio.gather(*(delete_file(url) for url in uploaded), return_exceptions=True)
+    for url, outcome in zip(uploaded, cleanup):
+        if isinstance(outcome, BaseException):
+            print(f"Could not clean up {url} after a failed upload: {outcome}")
+    raise errors[0]
+
+
+async def _upload_all(files: list, upload_one, concurrency: int = None):
+    request_slots = asyncio.Semaphore(concurrency or settings.UPLOAD_CONCURRENCY_PER_REQUEST)
+
+    async def one(file):
+        async with request_slots, _upload_slots:
+            return await upload_one(file)
+
+    results = await asyncio.gather(*(one(file) for file in files), return_exceptions=True)
+    await _raise_after_cleanup(results)
+    return results
+
+
+async def upload_files(files: list, path: str, concurrency: int = None):
+    """
+    Upload several files concurrently and return their URLs in input order.
+
+    At most `concurrency` uploads per call (UPLOAD_CONCURRENCY_PER_REQUEST by
+    default) and UPLOAD_CONCURRENCY_GLOBAL overall run at once. If any upload
+    fails, the ones that succeeded are deleted and the first error is raised.
+    """
+    return await _upload_all(files, lambda file: upload_file(file, path), concurrency)
+
+
+async def upload_images(files: list, path: str, concurrency: int = None):
+    """upload_files() for photos: one {variant: url} dict per file, via upload_image()."""
+    return await _upload_all(files, lambda file: upload_image(file, path), concurrency)
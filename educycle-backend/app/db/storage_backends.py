@@ -0,0 +1,375 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from urllib.parse import quote, unquote
+
+from google.api_core.exceptions import NotFound
+
+from app.core.config import settings
+from app.core.firebase import get_storage_bucket
+
+# Bytes read from the upload per step. Also the resumable-upload chunk size,
+# which Cloud Storage requires to be a multiple of 256 KB.
+CHUNK_SIZE = 1024 * 1024
+LOCAL_UPLOAD_DIR = "app/static/uploads"
+LOCAL_URL_PREFIX = "http://localhost:8000/static/uploads/"
+FIREBASE_URL_PREFIX = "https://storage.googleapis.com/"
+# Bucket prefix for content-addressed objects. Every upload of the same bytes
+# maps to one object, whatever feature it came from.
+OBJECT_PREFIX = "uploads"
+
+
+def _extension(content_type: str):
+    return content_type.split('/')[-1] if content_type and '/' in content_type else 'bin'
+
+
+class StorageBackend(ABC):
+    """
+    Where upload_file() puts bytes. Objects are content-addressed: `put`
+    stores a stream under its SHA-256 and returns (url, written), reusing an
+    existing object unless `overwrite` is set. `delete` is a no-op for an
+    object that is already gone. All methods block; callers run them in a
+    thread.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def put(self, reader, content_type: str, digest: str, overwrite: bool = False):
+        ...
+
+    @abstractmethod
+    def delete(self, url: str):
+        ...
+
+    @abstractmethod
+    def owns(self, url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def probe(self):
+        """Cheap round trip that raises if the backend can't currently serve uploads."""
+
+
+class FirebaseBackend(StorageBackend):
+    name = "firebase"
+
+    def put(self, reader, content_type, digest, overwrite=False):
+        bucket = get_storage_bucket()
+        blob = bucket.blob(f"{OBJECT_PREFIX}/{digest}")
+        if not overwrite and blob.exists():
+            return blob.public_url, False
+        # Setting chunk_size makes upload_from_file use a resumable session that
+        # sends one chunk at a time instead of buffering the whole file.
+        blob.chunk_size = CHUNK_SIZE
+        blob.upload_from_file(reader, content_type=content_type, rewind=False)
+        blob.make_public()
+        return blob.public_url, True
+
+    def delete(self, url):
+        bucket = get_storage_bucket()
+        prefix = f"{FIREBASE_URL_PREFIX}{bucket.name}/"
+        if not url.startswith(prefix):
+            raise ValueError(f"Not a URL in this bucket: {url}")
+        try:
+            bucket.blob(unquote(url[len(prefix):])).delete()
+        except NotFound:
+            pass
+
+    def owns(self, url):
+        return url.startswith(FIREBASE_URL_PREFIX)
+
+    def probe(self):
+        list(get_storage_bucket().list_blobs(max_results=1))
+
+
+class LocalBackend(StorageBackend):
+    """Files under app/static/uploads, served by the app itself."""
+
+    name = "local"
+
+    def put(self, reader, content_type, digest, overwrite=False):
+        filename = f"{digest}.{_extension(content_type)}"
+        local_path = f"{LOCAL_UPLOAD_DIR}/{filename}"
+        url = f"{LOCAL_URL_PREFIX}{filename}"
+        if not overwrite and os.path.exists(local_path):
+            return url, False
+
+        os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
+        # Write to a private temp name and rename, so concurrent identical uploads never see a partial file
+        temp_path = f"{local_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(temp_path, "wb") as f:
+                shutil.copyfileobj(reader, f, CHUNK_SIZE)
+            os.replace(temp_path, local_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return url, True
+
+    def delete(self, url):
+        try:
+            os.remove(f"{LOCAL_UPLOAD_DIR}/{url[len(LOCAL_URL_PREFIX):]}")
+        except FileNotFoundError:
+            pass
+
+    def owns(self, url):
+        return url.startswith(LOCAL_URL_PREFIX)
+
+    def probe(self):
+        os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
+        if not os.access(LOCAL_UPLOAD_DIR, os.W_OK):
+            raise PermissionError(f"{LOCAL_UPLOAD_DIR} is not writable")
+
+
+class S3Backend(StorageBackend):
+    """
+    An S3-compatible bucket (AWS S3, MinIO, R2, ...) through boto3, which is
+    optional and only imported when this backend is configured. Credentials
+    come from the usual AWS environment variables / config files.
+    """
+
+    name = "s3"
+
+    def __init__(self, bucket: str, endpoint_url: str = "", region: str = "", public_url: str = ""):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url or None
+        self.region = region or None
+        base = public_url or (f"{endpoint_url.rstrip('/')}/{bucket}" if endpoint_url
+                              else f"https://{bucket}.s3.amazonaws.com")
+        self.public_url = base.rstrip("/") + "/"
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3", endpoint_url=self.endpoint_url, region_name=self.region)
+        return self._client
+
+    def put(self, reader, content_type, digest, overwrite=False):
+        from botocore.exceptions import ClientError
+
+        key = f"{OBJECT_PREFIX}/{digest}"
+        url = f"{self.public_url}{quote(key)}"
+        client = self.client()
+        try:
+            if not overwrite:
+                client.head_object(Bucket=self.bucket, Key=key)
+                return url, False
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+        # upload_fileobj reads in parts (multipart above its threshold), never the whole file
+        client.upload_fileobj(reader, self.bucket, key, ExtraArgs={"ContentType": content_type})
+        return url, True
+
+    def delete(self, url):
+        if not self.owns(url):
+            raise ValueError(f"Not a URL in this bucket: {url}")
+        self.client().delete_object(Bucket=self.bucket, Key=unquote(url[len(self.public_url):]))
+
+    def owns(self, url):
+        return url.startswith(self.public_url)
+
+    def probe(self):
+        self.client().head_bucket(Bucket=self.bucket)
+
+
+def make_backend(name: str):
+    """Backend for a STORAGE_PRIMARY / STORAGE_FALLBACK value, or None if it can't be used here."""
+    name = (name or "").lower()
+    if name == "firebase":
+        return FirebaseBackend()
+    if name == "local":
+        return LocalBackend()
+    if name == "s3":
+        if not settings.S3_BUCKET:
+            print("S3 storage is configured but S3_BUCKET is empty; skipping it.")
+            return None
+        try:
+            import boto3  # noqa: F401
+        except ImportError:
+            print("S3 storage is configured but the 'boto3' package is not installed; skipping it.")
+            return None
+        return S3Backend(settings.S3_BUCKET, settings.S3_ENDPOINT_URL, settings.S3_REGION, settings.S3_PUBLIC_URL)
+    if name:
+        print(f"Unknown storage backend '{name}'; skipping it.")
+    return None
+
+
+class BackendHealth:
+    """
+    Circuit breaker and counters for one backend. After `threshold`
+    consecutive failures the circuit opens: uploads skip the backend until a
+    background probe succeeds and closes it again.
+    """
+
+    def __init__(self, backend: StorageBackend, threshold: int):
+        self.backend = backend
+        self.threshold = threshold
+        self.is_open = False
+        self.consecutive_failures = 0
+        self.uploads = 0
+        self.failures = 0
+        self.opened = 0
+        self.probes = 0
+        self.probe_failures = 0
+        self.last_error = None
+        self._last_failure = None
+        self._opened_at = None
+
+    def record_success(self):
+        self.uploads += 1
+        if self.is_open:
+            self.close()
+        self.consecutive_failures = 0
+
+    def record_failure(self, error: BaseException):
+        """Count a failed upload; True if this one opened the circuit."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        self._last_failure = time.monotonic()
+        if not self.is_open and self.consecutive_failures >= self.threshold:
+            self.is_open = True
+            self.opened += 1
+            self._opened_at = time.monotonic()
+            return True
+        return False
+
+    def close(self):
+        self.is_open = False
+        self.consecutive_failures = 0
+        self._opened_at = None
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "backend": self.backend.name,
+            "state": "open" if self.is_open else "closed",
+            "uploads": self.uploads,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "open_for_seconds": round(now - self._opened_at, 1) if self._opened_at else None,
+            "probes": self.probes,
+            "probe_failures": self.probe_failures,
+            "last_error": self.last_error,
+            "seconds_since_failure": round(now - self._last_failure, 1) if self._last_failure else None,
+        }
+
+
+class FailoverStorage:
+    """
+    Sends uploads to the primary backend and, when it fails, to the fallback.
+
+    While the primary's circuit is open uploads go straight to the fallback,
+    so a broken or misconfigured primary costs one failed attempt per
+    `threshold` uploads rather than one per upload. A background task probes
+    the primary every `probe_interval` seconds and closes the circuit once it
+    answers. Deletes go to whichever backend issued the URL.
+    """
+
+    def __init__(self, primary: StorageBackend, fallback: StorageBackend | None, threshold: int, probe_interval: float):
+        if primary is None:
+            primary, fallback = fallback or LocalBackend(), None
+        self.primary = BackendHealth(primary, threshold)
+        self.fallback = BackendHealth(fallback, threshold) if fallback and fallback.name != primary.name else None
+        self.probe_interval = probe_interval
+        self.failovers = 0
+        self.short_circuited = 0
+        self._probe_task = None
+
+    @property
+    def backends(self):
+        return [h.backend for h in (self.primary, self.fallback) if h]
+
+    def backend_for(self, url: str):
+        return next((b for b in self.backends if b.owns(url)), None)
+
+    async def _put(self, health: BackendHealth, reader, content_type, digest, overwrite):
+        try:
+            result = await asyncio.to_thread(health.backend.put, reader, content_type, digest, overwrite)
+        except Exception as e:
+            if health.record_failure(e):
+                print(f"Storage backend '{health.backend.name}' marked down after "
+                      f"{health.consecutive_failures} failures ({e}).")
+                if health is self.primary:
+                    self._start_probe()
+            raise
+        health.record_success()
+        return result
+
+    async def put(self, reader, content_type: str, digest: str, overwrite: bool = False):
+        """Store the (rewindable) stream; returns (url, written)."""
+        if self.fallback is None:
+            return await self._put(self.primary, reader, content_type, digest, overwrite)
+
+        if self.primary.is_open:
+            self.short_circuited += 1
+            return await self._put(self.fallback, reader, content_type, digest, overwrite)
+
+        try:
+            return await self._put(self.primary, reader, content_type, digest, overwrite)
+        except Exception as e:
+            print(f"Storage backend '{self.primary.backend.name}' failed ({e}), "
+                  f"falling back to '{self.fallback.backend.name}'.")
+        self.failovers += 1
+        reader.seek(0)
+        return await self._put(self.fallback, reader, content_type, digest, overwrite)
+
+    async def delete(self, url: str):
+        backend = self.backend_for(url)
+        if backend is None:
+            raise ValueError(f"No configured storage backend serves {url}")
+        await asyncio.to_thread(backend.delete, url)
+
+    def _start_probe(self):
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_until_healthy())
+
+    async def _probe_until_healthy(self):
+        health = self.primary
+        while health.is_open:
+            await asyncio.sleep(self.probe_interval)
+            health.probes += 1
+            try:
+                await asyncio.to_thread(health.backend.probe)
+            except Exception as e:
+                health.probe_failures += 1
+                health.last_error = f"{type(e).__name__}: {e}"
+                continue
+            health.close()
+            print(f"Storage backend '{health.backend.name}' is reachable again.")
+
+    async def stop(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def stats(self):
+        return {
+            "primary": self.primary.stats(),
+            "fallback": self.fallback.stats() if self.fallback else None,
+            # Uploads that hit a primary failure and were retried on the fallback
+            "failovers": self.failovers,
+            # Uploads sent straight to the fallback while the primary's circuit was open
+            "short_circuited": self.short_circuited,
+        }
+
+
+storage_backends = FailoverStorage(
+    make_backend(settings.STORAGE_PRIMARY),
+    make_backend(settings.STORAGE_FALLBACK),
+    settings.STORAGE_FAILURE_THRESHOLD,
+    settings.STORAGE_PROBE_INTERVAL_SECONDS,
+)
@@ -1,14 +1,47 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import auth, books, requests, chats, notes, ngo, feedback, impact, notifications, credits, location, distribution
+from app.core.config import settings
+from app.core.http import get_http_client, close_http_client
+from app.db.storage import shutdown_image_pool
+from app.db.storage_backends import storage_backends
+from app.services.book_catalog import book_catalog
+from app.services.chat_hub import chat_hub
+from app.services.geocoding_worker import geocoding_worker
+from app.utils.exceptions import UploadTooLarge
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    geocoding_worker.start(settings.GEOCODING_WORKERS)
+    if settings.BOOK_CATALOG_ENABLED:
+        book_catalog.start()
+    await chat_hub.start()
+    yield
+    await chat_hub.stop()
+    book_catalog.stop()
+    await geocoding_worker.stop()
+    shutdown_image_pool()
+    await storage_backends.stop()
+    await close_http_client()
+
 
 app = FastAPI(
     title="EduCycle Backend",
     version="1.0.0",
-    description="Backend APIs for EduCycle platform"
+    description="Backend APIs for EduCycle platform",
+    lifespan=lifespan,
 )
 
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large(request: Request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
 # CORS (frontend will call this)
 app.add_middleware(
     CORSMiddleware,
@@ -19,17 +52,39 @@ app.add_middleware(
 )
 
 from fastapi.staticfiles import StaticFiles
+from app.db.storage_backends import LOCAL_UPLOAD_DIR
+from app.utils.static_files import UploadFiles
 import os
 
 # Create static dir if not exists
-os.makedirs("app/static/uploads", exist_ok=True)
+os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
 
 # Health check
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
-# Mount static files
+
+@app.get("/health/stats")
+async def health_stats():
+    from app.db.firestore import get_profile_cache_stats
+    from app.core.token_verifier import token_verifier
+    from app.services.geocode_cache import geocode_cache
+    from app.services.search_cache import search_cache
+    from app.db.storage import get_storage_stats
+    return {
+        "profile_cache": get_profile_cache_stats(),
+        "token_cache": token_verifier.stats(),
+        "geocode_cache": geocode_cache.stats(),
+        "geocoding_worker": geocoding_worker.stats(),
+        "book_catalog": {"ready": book_catalog.ready, "books": len(book_catalog)},
+        "search_cache": search_cache.stats(),
+        "storage": get_storage_stats(),
+        "chat_hub": chat_hub.stats(),
+    }
+
+# Mount static files. Local-fallback uploads get caching headers and range support.
+app.mount("/static/uploads", UploadFiles(LOCAL_UPLOAD_DIR), name="uploads")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
 # API routers
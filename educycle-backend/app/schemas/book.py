@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -25,6 +25,7 @@ class BookResponse(BaseModel):
     area: str
     description: Optional[str]
     image_urls: List[str]
+    image_variants: Optional[List[Dict[str, str]]] = None
     donor_uid: str
     available: bool
     created_at: datetime
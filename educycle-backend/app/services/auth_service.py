@@ -1,9 +1,29 @@
-from app.services.location_service import geocode_address
+import asyncio
+from firebase_admin import auth as firebase_auth
+from app.services.geocoding_worker import geocoding_worker
+from app.services.ngo_index import ngo_index
 from datetime import datetime
-from app.db.firestore import create_user_if_not_exists
+from app.db.firestore import create_user_if_not_exists, get_user_by_uid
 
 
-async def bootstrap_user(uid: str, email: str, role: str, display_name: str | None = None, extra: dict | None = None):
+async def set_role_claim(uid: str, role: str):
+    """Stamp `role` as a custom claim, keeping any other claims on the account."""
+    user = await asyncio.to_thread(firebase_auth.get_user, uid)
+    claims = dict(user.custom_claims or {})
+    if claims.get("role") == role:
+        return
+    claims["role"] = role
+    await asyncio.to_thread(firebase_auth.set_custom_user_claims, uid, claims)
+
+
+async def bootstrap_user(
+    uid: str,
+    email: str,
+    role: str,
+    display_name: str | None = None,
+    extra: dict | None = None,
+    claimed_role: str | None = None,
+):
     data = {
         "uid": uid,
         "email": email,
@@ -16,19 +36,23 @@ async def bootstrap_user(uid: str, email: str, role: str, display_name: str | No
     if extra:
         data.update(extra)
         
-    # Geocode NGO address on registration
-    if role == "ngo" and extra:
-        city = extra.get("city", "")
-        area = extra.get("area", "")
-        addr_string = f"{area}, {city}"
-        
-        # We try to get coordinates. It's okay if it fails initially, 
-        # they can update profile later (though profile update logic needs to handle this too).
-        try:
-            lat, lon = await geocode_address(addr_string)
-            if lat and lon:
-                data["coordinates"] = {"lat": lat, "lon": lon}
-        except Exception as e:
-            print(f"Geocoding failed for {addr_string}: {e}")
-
     await create_user_if_not_exists(uid, data)
+
+    # The stored profile is authoritative: re-bootstrapping can't change an existing user's role.
+    profile = await get_user_by_uid(uid)
+    stored_role = (profile or {}).get("role", role)
+    if claimed_role != stored_role:
+        await set_role_claim(uid, stored_role)
+
+    if stored_role == "ngo":
+        # A new NGO, or a changed name/city/area, must show up in proximity lookups
+        ngo_index.mark_stale()
+
+    # Place new NGOs on the map in the background; registration doesn't wait on Nominatim.
+    if stored_role == "ngo" and profile and not profile.get("coordinates"):
+        city = profile.get("city", "")
+        area = profile.get("area", "")
+        if city and area:
+            geocoding_worker.enqueue(uid, f"{area}, {city}")
+
+    return stored_role
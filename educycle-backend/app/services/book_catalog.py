@@ -0,0 +1,181 @@
+import threading
+from collections import defaultdict
+
+from app.utils.geo import covering_cells, precision_for_radius
+
+# Fields with an inverted index (value -> book ids)
+FACETS = ("subject", "class_level", "board", "city", "area", "condition", "is_set")
+# Geohash prefix lengths indexed for radius search: ~625 km down to ~1 km cells
+GEO_PRECISIONS = range(2, 7)
+
+
+class BookCatalog:
+    """
+    In-process copy of every available book, kept current by a Firestore
+    on_snapshot listener on `books where available == True`.
+
+    Each facet has an inverted index, so a filter combination is answered by
+    intersecting id sets (smallest first) instead of running a Firestore query.
+    Filters on other fields are checked against the intersected candidates.
+    Books with a geohash are also indexed by cell at GEO_PRECISIONS, so a
+    radius search only touches books in the cells covering the circle.
+    Listener callbacks arrive on a Firestore thread, hence the lock.
+    """
+
+    def __init__(self):
+        self._books = {}
+        self._index = {facet: defaultdict(set) for facet in FACETS}
+        self._cells = defaultdict(set)  # geohash prefix -> book ids
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._watch = None
+        self._listeners = []
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def __len__(self):
+        return len(self._books)
+
+    def add_listener(self, callback):
+        """callback(book_ids) runs after every batch of changes, on the listener thread."""
+        self._listeners.append(callback)
+
+    def _index_book(self, book_id: str, book: dict):
+        for facet in FACETS:
+            value = book.get(facet)
+            try:
+                self._index[facet][value].add(book_id)
+            except TypeError:
+                pass  # unhashable (list/map) values can't be faceted
+        geohash = book.get("geohash")
+        if isinstance(geohash, str):
+            for precision in GEO_PRECISIONS:
+                self._cells[geohash[:precision]].add(book_id)
+
+    def _unindex_book(self, book_id: str, book: dict):
+        for facet in FACETS:
+            value = book.get(facet)
+            try:
+                ids = self._index[facet].get(value)
+            except TypeError:
+                continue
+            if ids is not None:
+                ids.discard(book_id)
+                if not ids:
+                    del self._index[facet][value]
+        geohash = book.get("geohash")
+        if isinstance(geohash, str):
+            for precision in GEO_PRECISIONS:
+                ids = self._cells.get(geohash[:precision])
+                if ids is not None:
+                    ids.discard(book_id)
+                    if not ids:
+                        del self._cells[geohash[:precision]]
+
+    def upsert(self, book_id: str, data: dict):
+        with self._lock:
+            self.remove(book_id)
+            book = {**data, "id": book_id}
+            self._books[book_id] = book
+            self._index_book(book_id, book)
+
+    def remove(self, book_id: str):
+        with self._lock:
+            book = self._books.pop(book_id, None)
+            if book is not None:
+                self._unindex_book(book_id, book)
+
+    def load(self, books):
+        """Replace the catalog with (book_id, data) pairs."""
+        with self._lock:
+            self._books.clear()
+            for facet in FACETS:
+                self._index[facet].clear()
+            self._cells.clear()
+            for book_id, data in books:
+                self.upsert(book_id, data)
+        self._ready.set()
+
+    def _on_snapshot(self, docs, changes, read_time):
+        changed = []
+        with self._lock:
+            for change in changes:
+                book_id = change.document.id
+                if change.type.name == "REMOVED":
+                    self.remove(book_id)
+                else:
+                    self.upsert(book_id, change.document.to_dict())
+                changed.append(book_id)
+        self._ready.set()
+        for callback in self._listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Book catalog listener failed: {e}")
+
+    def start(self):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        from app.core.firebase import get_firestore
+
+        # Snapshot listeners are only available on the synchronous client.
+        query = get_firestore().collection("books").where(filter=FieldFilter("available", "==", True))
+        self._watch = query.on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._ready.clear()
+
+    def query(self, filters: dict, ids=None) -> list[dict]:
+        """Books matching every field == value in `filters` (and within `ids`, if given), as shallow copies."""
+        with self._lock:
+            id_sets = [] if ids is None else [ids if isinstance(ids, (set, frozenset)) else set(ids)]
+            residual = {}
+            for key, value in filters.items():
+                if key in FACETS:
+                    try:
+                        id_sets.append(self._index[key].get(value, set()))
+                    except TypeError:
+                        return []
+                else:
+                    residual[key] = value
+
+            if id_sets:
+                id_sets.sort(key=len)
+                ids = id_sets[0].intersection(*id_sets[1:])
+            else:
+                ids = self._books.keys()
+
+            results = []
+            for book_id in ids:
+                book = self._books.get(book_id)
+                if book is not None and all(book.get(key) == value for key, value in residual.items()):
+                    results.append(dict(book))
+            return results
+
+    def near(self, lat: float, lon: float, radius_km: float):
+        """
+        Ids of located books in the geohash cells covering the circle: a
+        superset of the books within `radius_km`, to be checked exactly by
+        the caller. None when the radius is wider than the coarsest indexed cell.
+        """
+        if precision_for_radius(lat, radius_km) < GEO_PRECISIONS[0]:
+            return None
+        # Cells finer than the finest indexed level are covered by its cells
+        cells = {cell[:GEO_PRECISIONS[-1]] for cell in covering_cells(lat, lon, radius_km)}
+        with self._lock:
+            ids = set()
+            for cell in cells:
+                ids.update(self._cells.get(cell, ()))
+            return ids
+
+    def get(self, book_id: str):
+        with self._lock:
+            book = self._books.get(book_id)
+            return dict(book) if book is not None else None
+
+
+book_catalog = BookCatalog()
@@ -1,25 +1,49 @@
-from datetime import datetime
-from app.db.firestore import db, get_user_display_info
+import base64
+import bisect
+import json
+from datetime import datetime, timezone
+from app.db.firestore import db, get_user_by_uid, get_user_display_info, get_users_fields
+from app.db.storage import delete_files, stored_file_urls
 from google.cloud.firestore_v1.base_query import FieldFilter
+from app.core.config import settings
+from app.services.book_catalog import book_catalog
 from app.services.credits_service import add_edu_credits
+from app.services.geocode_cache import MISSING, geocode_cache, normalize_address
+from app.services.geocoding_worker import geocoding_worker
+from app.services.location_service import location_fields
+from app.services.search_cache import search_cache, search_key
+from app.services.text_search import book_text_index, rank_books
+from app.utils.cache import TTLCache
+from app.utils.geo_index import haversine_km
 
 
-async def donate_book(uid: str, payload: dict, image_urls: list[str]):
+async def donate_book(uid: str, payload: dict, image_urls: list[str], image_variants: list[dict] = None):
     ref = db.collection("books").document()
     
     user_info = await get_user_display_info(uid)
+    donor = (await _fetch_donor_info([uid])).get(uid, _UNKNOWN_DONOR)
+    address = ", ".join(part for part in (payload.get("area"), payload.get("city")) if part)
+    location = await _book_location(uid, address)
 
     data = {
         **payload,
         "donor_uid": uid,
         "donor_name": user_info["name"],
+        "donor_reputation": donor["reputation"],
+        "visibility_score": visibility_score(donor["reputation"], donor["mismatch_count"]),
         "image_urls": image_urls,
+        # {thumb, card, full} per photo; image_urls keeps the full-size URLs for older clients
+        "image_variants": image_variants or [{"full": url} for url in image_urls],
         "status": "available",
         "available": True,
         "created_at": datetime.utcnow(),
+        **location,
     }
 
-    ref.set(data)
+    await ref.set(data)
+    search_cache.invalidate()
+    if not location and address:
+        geocoding_worker.enqueue_book(ref.id, address)
     
     # Award credits immediately upon listing
     is_set = payload.get("is_set", False)
@@ -30,76 +54,374 @@ async def donate_book(uid: str, payload: dict, image_urls: list[str]):
     return ref.id
 
 
+async def _book_location(uid: str, address: str) -> dict:
+    """
+    Coordinates + geohash for a new listing without waiting on Nominatim: the
+    donor's own coordinates if their profile has them, else a cached geocode
+    of the pickup area. Empty when neither is known (the caller then queues a
+    background geocode).
+    """
+    profile = await get_user_by_uid(uid) or {}
+    coords = profile.get("coordinates")
+    if coords:
+        return location_fields(coords["lat"], coords["lon"])
+
+    if address:
+        cached = await geocode_cache.get("forward", normalize_address(address))
+        if cached is not MISSING and cached[0] is not None:
+            return location_fields(*cached)
+    return {}
+
+
 async def update_book_status(book_id: str, status: str):
     available = (status == "available")
-    db.collection("books").document(book_id).update({
+    await db.collection("books").document(book_id).update({
         "status": status,
         "available": available
     })
+    search_cache.invalidate()
 
 
-async def search_books(filters: dict, exclude_uid: str = None, blocked_uids: list[str] = None):
-    query = db.collection("books").where(filter=FieldFilter("available", "==", True))
+# Books below this score are hidden from search
+MIN_VISIBILITY_SCORE = 1.0
+# Firestore caps a write batch at 500 operations
+BATCH_WRITE_SIZE = 500
+
+
+def visibility_score(reputation: float, mismatch_count: int) -> float:
+    return reputation - (mismatch_count * 0.5)
+
+
+async def sync_donor_visibility(uid: str, reputation: float, mismatch_count: int):
+    """
+    Copy a donor's new score onto all of their books. Reserved and given
+    books are included so one that is put back on offer isn't ranked by a
+    stale score. Returns the number updated.
+    """
+    fields = {
+        "donor_reputation": reputation,
+        "visibility_score": visibility_score(reputation, mismatch_count),
+    }
+    docs = db.collection("books")\
+             .where(filter=FieldFilter("donor_uid", "==", uid))\
+             .select([])\
+             .stream()
+
+    refs = [doc.reference async for doc in docs]
+    for i in range(0, len(refs), BATCH_WRITE_SIZE):
+        batch = db.batch()
+        for ref in refs[i:i + BATCH_WRITE_SIZE]:
+            batch.update(ref, fields)
+        await batch.commit()
+
+    invalidate_donor(uid)
+    search_cache.invalidate()
+    return len(refs)
+
+
+_DONOR_FIELDS = ["organization_name", "display_name", "reputation", "mismatch_count"]
+_UNKNOWN_DONOR = {"name": "Unknown", "reputation": 5.0, "mismatch_count": 0}
+
+# Donor summaries used for search ranking; short-lived so reputation changes show up quickly
+_donor_cache = TTLCache(maxsize=settings.PROFILE_CACHE_SIZE, ttl=settings.DONOR_CACHE_TTL_SECONDS)
+
+
+def invalidate_donor(uid: str):
+    _donor_cache.invalidate(uid)
+
+
+async def _fetch_donor_info(donor_uids):
+    """Batch-load the donor fields search ranking needs, keyed by uid."""
+    donors = {}
+    missing = []
+    for uid in donor_uids:
+        cached = _donor_cache.get(uid)
+        if cached is not None:
+            donors[uid] = cached
+        else:
+            missing.append(uid)
 
+    if missing:
+        profiles = await get_users_fields(missing, _DONOR_FIELDS)
+        for uid, data in profiles.items():
+            donors[uid] = {
+                "name": data.get("organization_name") or data.get("display_name") or "Anonymous",
+                "reputation": data.get("reputation", 5.0),
+                "mismatch_count": data.get("mismatch_count", 0),
+            }
+            _donor_cache.set(uid, donors[uid])
+    return donors
+
+
+def _parse_filters(filters: dict) -> dict:
+    parsed = {}
     for key, value in filters.items():
         if value:
             # Handle boolean strings from frontend
             if value.lower() == 'true':
-                query = query.where(filter=FieldFilter(key, "==", True))
+                parsed[key] = True
             elif value.lower() == 'false':
-                query = query.where(filter=FieldFilter(key, "==", False))
+                parsed[key] = False
             else:
-                query = query.where(filter=FieldFilter(key, "==", value))
+                parsed[key] = value
+    return parsed
+
 
-    docs = query.stream()
+def _within(items: list[dict], lat: float, lon: float, radius_km: float):
+    """Located items within `radius_km` of (lat, lon), each with its "distance_km"."""
+    located = [item for item in items if isinstance(item.get("coordinates"), dict)]
+    if not located:
+        return []
+    distances = haversine_km(
+        lat, lon,
+        [item["coordinates"]["lat"] for item in located],
+        [item["coordinates"]["lon"] for item in located],
+    )
     results = []
-    user_cache = {}
-    blocked_uids = blocked_uids or []
+    for item, distance in zip(located, distances.tolist()):
+        if distance <= radius_km:
+            item["distance_km"] = round(distance, 2)
+            results.append(item)
+    return results
 
-    for doc in docs:
-        item = doc.to_dict()
-        donor_uid = item.get("donor_uid")
-        
-        # Filter out own books or blocked donors
-        if (exclude_uid and donor_uid == exclude_uid) or (donor_uid in blocked_uids):
-            continue
-            
-        if donor_uid not in user_cache:
-            user_doc = db.collection("users").document(donor_uid).get()
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                user_cache[donor_uid] = {
-                    "name": user_data.get("organization_name") or user_data.get("display_name") or "Anonymous",
-                    "reputation": user_data.get("reputation", 5.0),
-                    "mismatch_count": user_data.get("mismatch_count", 0)
-                }
-            else:
-                user_cache[donor_uid] = {"name": "Unknown", "reputation": 5.0, "mismatch_count": 0}
 
-        donor_info = user_cache[donor_uid]
-        
-        # Visibility logic
-        item["id"] = doc.id
+def _books_query(filters: dict):
+    """Firestore query for available books matching `filters` above the visibility cutoff, in _sort_key order."""
+    query = db.collection("books").where(filter=FieldFilter("available", "==", True))
+    for key, value in filters.items():
+        query = query.where(filter=FieldFilter(key, "==", value))
+    # Served by the (field, visibility_score, created_at, __name__) indexes in firestore.indexes.json
+    return query.where(filter=FieldFilter("visibility_score", ">=", MIN_VISIBILITY_SCORE))\
+                .order_by("visibility_score", direction="DESCENDING")\
+                .order_by("created_at", direction="DESCENDING")\
+                .order_by("__name__")
+
+
+async def _query_books(filters: dict, q: str = None, near: tuple = None):
+    """
+    Available books matching `filters`, from the in-memory catalog when it is
+    loaded. With a text query `q`, only books matching it are returned, each
+    carrying its "relevance". With `near` = (lat, lon, radius_km), only books
+    within the radius are returned, each carrying its "distance_km".
+    """
+    if book_catalog.ready:
+        hits = dict(book_text_index.search(q)) if q else None
+        ids = hits.keys() if hits is not None else None
+        if near:
+            # Geohash cells narrow the candidates; _within() does the exact cut
+            cell_ids = book_catalog.near(*near)
+            if cell_ids is not None:
+                ids = cell_ids if ids is None else cell_ids.intersection(ids)
+        items = book_catalog.query(filters, ids=ids)
+        if hits is not None:
+            for item in items:
+                item["relevance"] = hits[item["id"]]
+        return _within(items, *near) if near else items
+
+    items = [{**doc.to_dict(), "id": doc.id} async for doc in _books_query(filters).stream()]
+    if q:
+        hits = rank_books(items, q)
+        items = [{**item, "relevance": hits[item["id"]]} for item in items if item["id"] in hits]
+    return _within(items, *near) if near else items
+
+
+MAX_SEARCH_LIMIT = 100
+
+
+def _sort_key(item: dict):
+    """
+    Search order: distance asc (location search), text relevance desc (text
+    search), then visibility_score desc, created_at desc, id asc.
+    """
+    created_at = item.get("created_at")
+    created_ts = created_at.timestamp() if hasattr(created_at, "timestamp") else 0.0
+    key = (-item["visibility_score"], -created_ts, item["id"])
+    if "relevance" in item:
+        key = (-item["relevance"],) + key
+    if "distance_km" in item:
+        key = (item["distance_km"],) + key
+    return key
+
+
+def _search_mode(q: str = None, near: tuple = None) -> str:
+    """Which leading sort fields a search's keys have: d(istance), r(elevance), or just v(isibility)."""
+    return ("d" if near else "") + ("r" if q else "") or "v"
+
+
+def encode_cursor(mode: str, key) -> str:
+    return base64.urlsafe_b64encode(json.dumps([mode, *key]).encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Returns (mode, sort key) for a cursor made by encode_cursor()."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or not values:
+            raise ValueError
+        mode, *numbers, book_id = values
+        if mode not in ("v", "r", "d", "dr") or len(numbers) != 2 + len(mode.replace("v", "")):
+            raise ValueError
+        return mode, tuple(float(v) for v in numbers) + (str(book_id),)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _attach_donor(item: dict, donor_info: dict | None):
+    if donor_info is not None:
         item["donor_name"] = donor_info["name"]
         item["donor_reputation"] = donor_info["reputation"]
-        
-        visibility_score = donor_info["reputation"] - (donor_info["mismatch_count"] * 0.5)
-        item["visibility_score"] = visibility_score
+    else:
+        item.setdefault("donor_name", _UNKNOWN_DONOR["name"])
+        item.setdefault("donor_reputation", _UNKNOWN_DONOR["reputation"])
+
+
+async def _rank_books(filters: dict, q: str = None, near: tuple = None):
+    """
+    The user-independent part of a search: matching books above the
+    visibility cutoff, donor fields attached, in result order. Returns
+    (sort keys, items) so pages can be found by bisecting the keys.
+    """
+    items = await _query_books(filters, q, near)
+
+    # Scores are stored on the book; only books listed before that need the donor lookup
+    donors = await _fetch_donor_info({
+        item.get("donor_uid") for item in items
+        if "visibility_score" not in item or "donor_reputation" not in item
+    })
+
+    ranked = []
+    for item in items:
+        donor_info = donors.get(item.get("donor_uid"))
+        if "visibility_score" not in item:
+            info = donor_info or _UNKNOWN_DONOR
+            item["visibility_score"] = visibility_score(info["reputation"], info["mismatch_count"])
         
         # Hide if extremely poor reputation (unless specifically allowed/different for NGOs)
-        if visibility_score < 1.0:
+        if item["visibility_score"] < MIN_VISIBILITY_SCORE:
             continue
-            
-        results.append(item)
 
-    # Sort results by visibility score descending
-    results.sort(key=lambda x: x.get("visibility_score", 5.0), reverse=True)
+        _attach_donor(item, donor_info)
+        ranked.append(item)
 
-    return results
+    ranked.sort(key=_sort_key)
+    return [_sort_key(item) for item in ranked], ranked
+
+
+async def _firestore_page(filters: dict, after: tuple, limit: int, hidden):
+    """
+    One page of a plain search (no q or near) read straight from Firestore,
+    for when the catalog isn't loaded. The query runs in _sort_key order from
+    the cursor, limit + 1 books at a time, so a page costs about limit + 1
+    reads instead of every match; `hidden(donor_uid)` books are skipped by
+    reading on. Only the page gets donor fields attached.
+    """
+    query = _books_query(filters)
+    position = None
+    if after is not None:
+        visibility, created_ts, book_id = after
+        position = [-visibility, datetime.fromtimestamp(-created_ts, tz=timezone.utc), book_id]
+
+    page = []
+    while len(page) <= limit:
+        batch = query.limit(limit + 1)
+        if position is not None:
+            batch = batch.start_after(position)
+        docs = [doc async for doc in batch.stream()]
+        for doc in docs:
+            item = {**doc.to_dict(), "id": doc.id}
+            if not hidden(item.get("donor_uid")) and len(page) <= limit:
+                page.append(item)
+        if len(docs) <= limit:
+            break
+        last = docs[-1].to_dict()
+        position = [last["visibility_score"], last["created_at"], docs[-1].id]
+
+    donors = await _fetch_donor_info({item.get("donor_uid") for item in page if "donor_reputation" not in item})
+    for item in page:
+        _attach_donor(item, donors.get(item.get("donor_uid")))
+    return page
+
+
+async def search_books(
+    filters: dict,
+    exclude_uid: str = None,
+    blocked_uids: list[str] = None,
+    limit: int = None,
+    cursor: str = None,
+    q: str = None,
+    near: tuple = None,
+):
+    """
+    Available books matching `filters`, best visibility first. A free-text
+    `q` (typo-tolerant, last word matched as a prefix) narrows the results
+    to matching titles/descriptions and ranks them by relevance first.
+    `near` = (lat, lon, radius_km) keeps books within the radius, nearest
+    first; books without coordinates are left out.
+
+    Without `limit`/`cursor` the full list is returned, as before. With them,
+    returns {"items": [...], "next_cursor": str | None}; the cursor is the
+    opaque sort key of the last item served.
+
+    The ranked list per filter set comes from search_cache; excluding the
+    caller's own and blocked donors' books and paging happen per request.
+    A paged plain search while the catalog is still loading reads just the
+    page from Firestore instead (see _firestore_page).
+    """
+    mode = _search_mode(q, near)
+    after = None
+    if cursor:
+        cursor_mode, after = decode_cursor(cursor)
+        if cursor_mode != mode:
+            raise ValueError("Cursor belongs to a different search (q or location changed)")
+    blocked_uids = set(blocked_uids or [])
+    filters = _parse_filters(filters)
+    if near:
+        # ~100 m grid so nearby searchers share cache entries
+        lat, lon, radius_km = near
+        near = (round(lat, 3), round(lon, 3), radius_km)
+
+    paged = limit is not None or after is not None
+    if paged:
+        limit = max(1, min(limit or MAX_SEARCH_LIMIT, MAX_SEARCH_LIMIT))
+
+    def hidden(donor_uid):
+        return (exclude_uid and donor_uid == exclude_uid) or donor_uid in blocked_uids
+
+    if paged and mode == "v" and not book_catalog.ready:
+        page = await _firestore_page(filters, after, limit, hidden)
+        next_cursor = encode_cursor(mode, _sort_key(page[limit - 1])) if len(page) > limit else None
+        return {"items": page[:limit], "next_cursor": next_cursor}
+
+    keys, ranked = await search_cache.get_or_compute(
+        search_key(filters, q, near),
+        lambda: _rank_books(filters, q, near),
+    )
+
+    start = 0
+    if after is not None:
+        start = bisect.bisect_right(keys, after)
+
+    page = []
+    for i in range(start, len(ranked)):
+        item = ranked[i]
+        # Filter out own books or blocked donors
+        if hidden(item.get("donor_uid")):
+            continue
+
+        page.append(dict(item))
+        # One extra item tells us there is a next page
+        if paged and len(page) > limit:
+            break
+
+    if not paged:
+        return page
+
+    next_cursor = encode_cursor(mode, _sort_key(page[limit - 1])) if len(page) > limit else None
+    return {"items": page[:limit], "next_cursor": next_cursor}
 
 
 async def get_book(book_id: str):
-    doc = db.collection("books").document(book_id).get()
+    doc = await db.collection("books").document(book_id).get()
     if doc.exists:
         item = {**doc.to_dict(), "id": doc.id}
         if "donor_name" not in item:
@@ -110,23 +432,27 @@ async def get_book(book_id: str):
 
 
 async def mark_book_unavailable(book_id: str):
-    db.collection("books").document(book_id).update({"available": False})
+    await db.collection("books").document(book_id).update({"available": False})
+    search_cache.invalidate()
 
 
 async def get_my_books(uid: str):
     docs = db.collection("books").where(filter=FieldFilter("donor_uid", "==", uid)).stream()
-    return [{**doc.to_dict(), "id": doc.id} for doc in docs]
+    return [{**doc.to_dict(), "id": doc.id} async for doc in docs]
 
 
 async def delete_book(book_id: str, uid: str):
     ref = db.collection("books").document(book_id)
-    doc = ref.get()
+    doc = await ref.get()
 
     if not doc.exists:
         return False
 
-    if doc.to_dict().get("donor_uid") != uid:
+    data = doc.to_dict()
+    if data.get("donor_uid") != uid:
         return False
 
-    ref.delete()
+    await ref.delete()
+    search_cache.invalidate()
+    await delete_files(stored_file_urls(data))
     return True
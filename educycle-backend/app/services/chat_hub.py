@@ -0,0 +1,144 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+from app.core.config import settings
+
+
+class Broker(ABC):
+    """
+    Carries chat messages between app workers. The hub publishes every new
+    message here and gets back every message (its own and other workers')
+    through the `deliver(chat_id, message)` callback given to start().
+
+    InMemoryBroker covers a single worker. A multi-worker deployment plugs in
+    one backed by a shared pub/sub (Redis, NATS, Firestore listeners, ...):
+    subscribe/unsubscribe are called when the first local socket joins a chat
+    and the last one leaves, so a worker only listens to chats it serves.
+    """
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, chat_id: str, message: dict):
+        ...
+
+    async def subscribe(self, chat_id: str):
+        pass
+
+    async def unsubscribe(self, chat_id: str):
+        pass
+
+
+class InMemoryBroker(Broker):
+    async def publish(self, chat_id, message):
+        self._deliver(chat_id, message)
+
+
+class Subscription:
+    """One socket's view of a chat: a bounded queue of messages waiting to be sent."""
+
+    def __init__(self, chat_id: str, uid: str, maxsize: int):
+        self.chat_id = chat_id
+        self.uid = uid
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def put(self, message: dict):
+        """Queue a message; a client that falls `maxsize` behind is cut off instead of buffering without limit."""
+        if self.lagged:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.lagged = True
+            # Make room for the sentinel that tells the writer to close the socket
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def get(self):
+        """Next message to send, or None once the subscriber has lagged and must reconnect."""
+        return await self.queue.get()
+
+
+class ChatHub:
+    """
+    Fans new chat messages out to the WebSocket connections open on this
+    worker. send_message() publishes through the broker; the broker hands
+    each message back to deliver(), which queues it for every local
+    subscriber of that chat. Sockets never block each other: each has its
+    own queue, drained by its own writer.
+    """
+
+    def __init__(self, broker: Broker, queue_size: int):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._rooms = {}
+        self._started = False
+        self.published = 0
+        self.delivered = 0
+        self.lagged = 0
+
+    async def start(self):
+        if not self._started:
+            await self.broker.start(self.deliver)
+            self._started = True
+
+    async def stop(self):
+        if self._started:
+            for subscriptions in self._rooms.values():
+                for subscription in subscriptions:
+                    subscription.put(None)
+            await self.broker.stop()
+            self._started = False
+
+    async def join(self, chat_id: str, uid: str):
+        await self.start()
+        subscription = Subscription(chat_id, uid, self.queue_size)
+        room = self._rooms.setdefault(chat_id, set())
+        room.add(subscription)
+        if len(room) == 1:
+            await self.broker.subscribe(chat_id)
+        return subscription
+
+    async def leave(self, subscription: Subscription):
+        room = self._rooms.get(subscription.chat_id)
+        if room is None:
+            return
+        room.discard(subscription)
+        if not room:
+            del self._rooms[subscription.chat_id]
+            await self.broker.unsubscribe(subscription.chat_id)
+
+    async def publish(self, chat_id: str, message: dict):
+        await self.start()
+        self.published += 1
+        await self.broker.publish(chat_id, message)
+
+    def deliver(self, chat_id: str, message: dict):
+        """Broker callback (on the event loop): queue `message` for this worker's sockets in the chat."""
+        for subscription in list(self._rooms.get(chat_id, ())):
+            already_lagged = subscription.lagged
+            if subscription.put(message):
+                self.delivered += 1
+            elif not already_lagged:
+                self.lagged += 1
+
+    def stats(self):
+        return {
+            "broker": type(self.broker).__name__,
+            "chats": len(self._rooms),
+            "connections": sum(len(room) for room in self._rooms.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "lagged": self.lagged,
+        }
+
+
+chat_hub = ChatHub(InMemoryBroker(), settings.CHAT_SOCKET_QUEUE_SIZE)
@@ -1,11 +1,12 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from app.db.firestore import db
+from app.services.chat_hub import chat_hub
 
 
 async def create_chat(request_id: str, users: list[str], book_title: str = "Book Chat"):
     ref = db.collection("chats").document(request_id)
 
-    ref.set({
+    await ref.set({
         "request_id": request_id,
         "users": users,
         "book_title": book_title,
@@ -16,12 +17,23 @@ async def create_chat(request_id: str, users: list[str], book_title: str = "Book
 
 async def send_message(chat_id: str, sender_uid: str, message: str):
     # Add message
-    msg_ref = db.collection("messages").add({
+    data = {
         "chat_id": chat_id,
         "sender_uid": sender_uid,
         "message": message,
         "timestamp": datetime.utcnow(),
-    })
+    }
+    _, ref = await db.collection("messages").add(data)
+
+    try:
+        # Push to open chat sockets, in the same shape get_chat_messages returns
+        await chat_hub.publish(chat_id, {
+            **data,
+            "timestamp": data["timestamp"].replace(tzinfo=timezone.utc).isoformat(),
+            "id": ref.id,
+        })
+    except Exception as e:
+        print(f"Error publishing chat message: {e}")
 
     try:
         # Create notification for the other user(s)
@@ -40,7 +52,7 @@ async def send_message(chat_id: str, sender_uid: str, message: str):
                             title = book.get("title")
                             # Update chat doc for next time
                             if title:
-                                db.collection("chats").document(chat_id).update({"book_title": title})
+                                await db.collection("chats").document(chat_id).update({"book_title": title})
                 except Exception as e:
                     print(f"Error fetching title for legacy chat: {e}")
             
@@ -50,7 +62,7 @@ async def send_message(chat_id: str, sender_uid: str, message: str):
             for user_uid in chat["users"]:
                 if user_uid != sender_uid:
                     # Create notification
-                    db.collection("notifications").add({
+                    await db.collection("notifications").add({
                         "user_uid": user_uid,
                         "type": "chat",
                         "related_id": chat_id,
@@ -63,34 +75,67 @@ async def send_message(chat_id: str, sender_uid: str, message: str):
 
 
 async def get_chat(chat_id: str):
-    doc = db.collection("chats").document(chat_id).get()
+    doc = await db.collection("chats").document(chat_id).get()
     if doc.exists:
         return {**doc.to_dict(), "id": doc.id}
     return None
 
 
-async def get_chat_messages(chat_id: str):
-    """Get all messages for a chat"""
+MAX_MESSAGES_LIMIT = 200
+
+
+def _message_dict(doc):
+    data = doc.to_dict()
+    # Ensure timestamp is converted to ISO string for JSON serialization if it's a datetime
+    timestamp = data.get("timestamp")
+    if isinstance(timestamp, datetime):
+        data["timestamp"] = timestamp.isoformat()
+    return {**data, "id": doc.id}
+
+
+async def _cursor_snapshot(chat_id: str, message_id: str):
+    snapshot = await db.collection("messages").document(message_id).get()
+    if not snapshot.exists or snapshot.to_dict().get("chat_id") != chat_id:
+        raise ValueError("Invalid cursor: not a message in this chat")
+    return snapshot
+
+
+async def get_chat_messages(chat_id: str, after: str = None, before: str = None, limit: int = None):
+    """
+    Messages for a chat, oldest first.
+
+    `after` / `before` are message ids (the `id` of a message already
+    returned): `after` gives only newer messages, for polling; `before` gives
+    the `limit` messages just older than it, for scrolling back. With only
+    `limit`, the latest `limit` messages are returned. Served by ordered
+    queries on the messages (chat_id, timestamp) indexes; ties on timestamp
+    are broken by document id, so a cursor never skips or repeats a message.
+    Raises ValueError for an unknown cursor or a bad limit.
+    """
+    if limit is not None and not 1 <= limit <= MAX_MESSAGES_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_MESSAGES_LIMIT}")
+    if after and before:
+        raise ValueError("Use either after or before, not both")
+
+    messages = db.collection("messages").where("chat_id", "==", chat_id)
+    # Scrolling back (and "latest N") walks the index newest-first, then flips the page
+    newest_first = bool(before) or (limit is not None and not after)
+    query = messages.order_by("timestamp", direction="DESCENDING" if newest_first else "ASCENDING")
+    cursor = after or before
+    if cursor:
+        query = query.start_after(await _cursor_snapshot(chat_id, cursor))
+    if limit is not None:
+        query = query.limit(limit)
+
     try:
-        # Remove order_by to avoid index requirement, sort in memory instead
-        docs = db.collection("messages").where("chat_id", "==", chat_id).stream()
-        results = []
-        for doc in docs:
-            data = doc.to_dict()
-            # Ensure timestamp is converted to ISO string for JSON serialization if it's a datetime
-            timestamp = data.get("timestamp")
-            if isinstance(timestamp, datetime):
-                data["timestamp"] = timestamp.isoformat()
-            
-            results.append({**data, "id": doc.id})
-        
-        # Sort by timestamp
-        results.sort(key=lambda x: x.get("timestamp", ""))
-        return results
+        results = [_message_dict(doc) async for doc in query.stream()]
     except Exception as e:
         print(f"Error getting messages: {e}")
         return []
+    if newest_first:
+        results.reverse()
+    return results
 
 
 async def close_chat(chat_id: str):
-    db.collection("chats").document(chat_id).update({"active": False})
+    await db.collection("chats").document(chat_id).update({"active": False})
@@ -1,11 +1,11 @@
-from app.db.firestore import db
+from app.db.firestore import db, invalidate_user
 from datetime import datetime
 from google.cloud.firestore_v1.base_query import FieldFilter
 
 async def add_edu_credits(uid: str, amount: int, reason: str):
     """Add EduCredits to a user and log the transaction"""
     user_ref = db.collection("users").document(uid)
-    doc = user_ref.get()
+    doc = await user_ref.get()
     
     if not doc.exists:
         return False
@@ -13,13 +13,14 @@ async def add_edu_credits(uid: str, amount: int, reason: str):
     current_credits = doc.to_dict().get("edu_credits", 0)
     new_credits = current_credits + amount
     
-    user_ref.update({
+    await user_ref.update({
         "edu_credits": new_credits,
         "last_credit_update": datetime.utcnow()
     })
+    invalidate_user(uid)
     
     # Log transaction
-    db.collection("credit_transactions").add({
+    await db.collection("credit_transactions").add({
         "user_uid": uid,
         "amount": amount,
         "reason": reason,
@@ -38,7 +39,7 @@ async def get_leaderboard(limit: int = 10):
              .stream()
     
     leaderboard = []
-    for doc in docs:
+    async for doc in docs:
         data = doc.to_dict()
         leaderboard.append({
             "uid": doc.id,
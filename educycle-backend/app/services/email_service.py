@@ -25,7 +25,7 @@ async def send_otp_email(email: str):
     log_debug(f"SENDING OTP: email=[{email}], otp=[{otp}]")
     
     # Save to Firestore
-    db.collection("otps").document(email).set({
+    await db.collection("otps").document(email).set({
         "otp": otp,
         "expires_at": expires_at,
         "created_at": datetime.utcnow()
@@ -91,7 +91,7 @@ async def verify_otp(email: str, otp: str, delete_on_success: bool = True):
     
     logger.info(f"Verifying OTP for email: [{email}]")
     doc_ref = db.collection("otps").document(email)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     
     if not doc.exists:
         log_debug(f"FAILED: doc not found for [{email}]")
@@ -115,7 +115,7 @@ async def verify_otp(email: str, otp: str, delete_on_success: bool = True):
     # Check expiry
     if now > expires_at:
         logger.warning(f"OTP EXPIRED for {email}. Now: {now}, Expires: {expires_at}")
-        doc_ref.delete()
+        await doc_ref.delete()
         return False, "OTP has expired"
     
     # Check match
@@ -124,7 +124,7 @@ async def verify_otp(email: str, otp: str, delete_on_success: bool = True):
         logger.info(f"OTP match successful for {email}")
         # Delete after successful verification if requested
         if delete_on_success:
-            doc_ref.delete()
+            await doc_ref.delete()
         return True, "Verification successful"
     
     log_debug(f"MISMATCH: stored=[{stored_otp}], input=[{otp}]")
@@ -133,5 +133,5 @@ async def verify_otp(email: str, otp: str, delete_on_success: bool = True):
 
 async def delete_otp(email: str):
     email = email.strip().lower()
-    db.collection("otps").document(email).delete()
+    await db.collection("otps").document(email).delete()
     log_debug(f"DELETED OTP for [{email}]")
@@ -1,12 +1,13 @@
 from datetime import datetime
-from app.db.firestore import db
+from app.db.firestore import db, invalidate_user
 from firebase_admin import firestore
+from app.services.book_service import sync_donor_visibility
 
 
 async def submit_feedback(from_uid: str, to_uid: str, payload: dict):
     ref = db.collection("feedback").document()
 
-    ref.set({
+    await ref.set({
         "from_uid": from_uid,
         "to_uid": to_uid,
         **payload,
@@ -23,7 +24,7 @@ async def update_reputation(uid: str):
     count = 0
     mismatch_count = 0
     
-    for doc in docs:
+    async for doc in docs:
         data = doc.to_dict()
         rating = data.get("rating", 5)
         
@@ -40,7 +41,10 @@ async def update_reputation(uid: str):
 
     avg = total_rating / count
 
-    db.collection("users").document(uid).update({
-        "reputation": round(avg, 2),
+    reputation = round(avg, 2)
+    await db.collection("users").document(uid).update({
+        "reputation": reputation,
         "mismatch_count": mismatch_count
     })
+    invalidate_user(uid)
+    await sync_donor_visibility(uid, reputation, mismatch_count)
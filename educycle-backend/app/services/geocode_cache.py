@@ -0,0 +1,142 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+# Reverse lookups are cached per ~110 m grid square
+REVERSE_KEY_DECIMALS = 3
+
+MISSING = object()
+
+
+def normalize_address(address: str) -> str:
+    """'  Anna Nagar ,Chennai ' and 'anna nagar, chennai' share one cache entry."""
+    parts = [re.sub(r"\s+", " ", part).strip() for part in address.lower().split(",")]
+    return ", ".join(part for part in parts if part)
+
+
+def reverse_key(lat: float, lon: float) -> str:
+    return f"{round(lat, REVERSE_KEY_DECIMALS)},{round(lon, REVERSE_KEY_DECIMALS)}"
+
+
+class GeocodeCache:
+    """
+    Geocoding results in an in-memory LRU backed by a local SQLite file, so
+    they survive restarts and are shared by every worker on the host.
+    Forward entries map a normalized address to (lat, lon), or (None, None)
+    when Nominatim had no match; reverse entries map a rounded lat/lon to
+    the cleaned address dict.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._memory = TTLCache(maxsize=settings.GEOCODE_MEMORY_CACHE_SIZE, ttl=settings.GEOCODE_CACHE_TTL_SECONDS)
+        self.disk_hits = 0
+        self.upstream_fetches = 0
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (kind, key))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _read(self, kind: str, key: str):
+        with self._conn_lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM geocode_cache WHERE kind = ? AND key = ?",
+                (kind, key),
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return MISSING
+        return json.loads(row[0])
+
+    def _write(self, kind: str, key: str, value, ttl: float):
+        with self._conn_lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (kind, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), time.time() + ttl),
+            )
+            conn.commit()
+
+    async def get(self, kind: str, key: str):
+        """Cached value, or MISSING."""
+        value = self._memory.get((kind, key), MISSING)
+        if value is not MISSING:
+            return value
+
+        value = await asyncio.to_thread(self._read, kind, key)
+        if value is not MISSING:
+            self.disk_hits += 1
+            self._memory.set((kind, key), value)
+        return value
+
+    async def set(self, kind: str, key: str, value, ttl: float | None = None):
+        ttl = settings.GEOCODE_CACHE_TTL_SECONDS if ttl is None else ttl
+        self._memory.set((kind, key), value, ttl=ttl)
+        await asyncio.to_thread(self._write, kind, key, value, ttl)
+
+    def stats(self):
+        return {
+            "memory": self._memory.stats(),
+            "disk_hits": self.disk_hits,
+            "upstream_fetches": self.upstream_fetches,
+            "queued": nominatim_queue.pending,
+        }
+
+
+class NominatimQueue:
+    """
+    Funnels cache misses to Nominatim: identical in-flight lookups share one
+    request, and request starts are spaced at least `interval` seconds apart
+    (the public instance allows 1 req/s per client).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+        self._inflight = {}
+
+    @property
+    def pending(self):
+        return len(self._inflight)
+
+    async def _wait_turn(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+    async def run(self, key, fetch):
+        task = self._inflight.get(key)
+        if task is None:
+            async def paced():
+                try:
+                    await self._wait_turn()
+                    return await fetch()
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.ensure_future(paced())
+            self._inflight[key] = task
+        # Shield so one caller giving up doesn't cancel the lookup for the others.
+        return await asyncio.shield(task)
+
+
+geocode_cache = GeocodeCache(settings.GEOCODE_CACHE_PATH)
+nominatim_queue = NominatimQueue(settings.NOMINATIM_MIN_INTERVAL_SECONDS)
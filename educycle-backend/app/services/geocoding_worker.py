@@ -0,0 +1,112 @@
+import asyncio
+from app.db.firestore import db, invalidate_user
+from app.services.ngo_index import ngo_index
+
+
+class GeocodingWorker:
+    """
+    Places NGOs (and books) that are missing coordinates, off the request path.
+
+    Request handlers enqueue an NGO or book and move on; background tasks
+    started by the app lifespan geocode it (through the cached, rate-limited
+    Nominatim queue) and write coordinates + geohash back to the document.
+    Scripts can drive the NGO path synchronously with run_batch().
+    """
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self._queued = set()
+        self._tasks = []
+        self.placed = 0
+        self.failed = 0
+
+    def _enqueue(self, kind: str, doc_id: str, address: str):
+        if (kind, doc_id) in self._queued:
+            return False
+        self._queued.add((kind, doc_id))
+        self._queue.put_nowait((kind, doc_id, address))
+        return True
+
+    def enqueue(self, uid: str, address: str):
+        return self._enqueue("ngo", uid, address)
+
+    def enqueue_book(self, book_id: str, address: str):
+        return self._enqueue("book", book_id, address)
+
+    async def geocode_ngo(self, uid: str, address: str):
+        from app.services.location_service import geocode_address, location_fields
+
+        lat, lon = await geocode_address(address)
+        if lat is None or lon is None:
+            self.failed += 1
+            return False
+
+        await db.collection("users").document(uid).update(location_fields(lat, lon))
+        invalidate_user(uid)
+        ngo_index.mark_stale()
+        self.placed += 1
+        return True
+
+    async def geocode_book(self, book_id: str, address: str):
+        from app.services.location_service import geocode_address, location_fields
+
+        lat, lon = await geocode_address(address)
+        if lat is None or lon is None:
+            self.failed += 1
+            return False
+
+        # The catalog picks the new location up through its snapshot listener
+        await db.collection("books").document(book_id).update(location_fields(lat, lon))
+        self.placed += 1
+        return True
+
+    async def _run(self):
+        while True:
+            kind, doc_id, address = await self._queue.get()
+            try:
+                if kind == "book":
+                    await self.geocode_book(doc_id, address)
+                else:
+                    await self.geocode_ngo(doc_id, address)
+            except Exception as e:
+                self.failed += 1
+                print(f"Background geocoding failed for {kind} {doc_id} ({address}): {e}")
+            finally:
+                self._queued.discard((kind, doc_id))
+                self._queue.task_done()
+
+    def start(self, workers: int = 1):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_batch(self, jobs: list[tuple[str, str]], concurrency: int = 4):
+        """Geocode (uid, address) pairs with at most `concurrency` in flight. Returns the number placed."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(uid, address):
+            async with semaphore:
+                try:
+                    return await self.geocode_ngo(uid, address)
+                except Exception as e:
+                    self.failed += 1
+                    print(f"   ❌ Error geocoding {uid} ({address}): {e}")
+                    return False
+
+        results = await asyncio.gather(*(one(uid, address) for uid, address in jobs))
+        return sum(1 for placed in results if placed)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "placed": self.placed,
+            "failed": self.failed,
+        }
+
+
+geocoding_worker = GeocodingWorker()
@@ -4,18 +4,18 @@ from app.db.firestore import db, get_user_by_uid
 async def calculate_user_impact(uid: str):
     # Books shared (donated)
     donated_docs = db.collection("books").where("donor_uid", "==", uid).stream()
-    books_shared = len(list(donated_docs))
+    books_shared = len([doc async for doc in donated_docs])
     
     # Books received (completed requests)
     received_docs = db.collection("requests")\
                       .where("requester_uid", "==", uid)\
                       .where("status", "==", "completed")\
                       .stream()
-    books_received = len(list(received_docs))
+    books_received = len([doc async for doc in received_docs])
 
     # Bulk requests fulfilled count
     bulk_docs = db.collection("ngo_requests").where("ngo_uid", "==", uid).stream()
-    bulk_fulfilled = sum(doc.to_dict().get("fulfilled", 0) for doc in bulk_docs)
+    bulk_fulfilled = sum([doc.to_dict().get("fulfilled", 0) async for doc in bulk_docs])
 
     # EduCredits from profile
     profile = await get_user_by_uid(uid)
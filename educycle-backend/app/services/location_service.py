@@ -1,41 +1,76 @@
-import httpx
-import math
+import asyncio
 import re
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.core.config import settings
+from app.core.http import get_http_client
 from app.db.firestore import db
+from app.services.geocoding_worker import geocoding_worker
+from app.services.ngo_index import ngo_index
+from app.services.geocode_cache import MISSING, geocode_cache, nominatim_queue, normalize_address, reverse_key
+from app.utils.geo import GEOHASH_RANGE_END, covering_cells, geohash_encode
+from app.utils.geo_index import haversine_km
 from datetime import datetime
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_URL = f"{settings.NOMINATIM_BASE_URL}/search"
 USER_AGENT = "EduCycle/1.0"
 
 async def verify_pickup_location(name: str, city: str):
-    params = {"q": f"{name}, {city}", "format": "json", "limit": 1}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(NOMINATIM_URL, params=params, headers={"User-Agent": USER_AGENT})
-    data = res.json()
-    return len(data) > 0
+    lat, _ = await geocode_address(f"{name}, {city}")
+    return lat is not None
 
 
-NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
+NOMINATIM_REVERSE_URL = f"{settings.NOMINATIM_BASE_URL}/reverse"
 
 async def geocode_address(address: str):
     """Convert an address string to lat/lon"""
-    params = {"q": address, "format": "json", "limit": 1}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(NOMINATIM_URL, params=params, headers={"User-Agent": USER_AGENT})
-    
-    data = res.json()
-    if data:
-        return float(data[0]["lat"]), float(data[0]["lon"])
-    return None, None
+    key = normalize_address(address)
+    cached = await geocode_cache.get("forward", key)
+    if cached is not MISSING:
+        return tuple(cached)
+
+    async def fetch():
+        params = {"q": address, "format": "json", "limit": 1}
+        geocode_cache.upstream_fetches += 1
+        res = await get_http_client().get(NOMINATIM_URL, params=params, headers={"User-Agent": USER_AGENT})
+        res.raise_for_status()
+
+        data = res.json()
+        if data:
+            result = (float(data[0]["lat"]), float(data[0]["lon"]))
+            await geocode_cache.set("forward", key, result)
+        else:
+            result = (None, None)
+            # Unknown addresses are retried sooner in case the map data improves
+            await geocode_cache.set("forward", key, result, ttl=settings.GEOCODE_NEGATIVE_TTL_SECONDS)
+        return result
+
+    return await nominatim_queue.run(("forward", key), fetch)
+
 
 async def reverse_geocode_coordinates(lat: float, lon: float):
     """Convert lat/lon to address details (City, Area)"""
+    key = reverse_key(lat, lon)
+    cached = await geocode_cache.get("reverse", key)
+    if cached is not MISSING:
+        return cached
+
+    async def fetch():
+        result = await _fetch_reverse(key)
+        if result is not None:
+            await geocode_cache.set("reverse", key, result)
+        return result
+
+    return await nominatim_queue.run(("reverse", key), fetch)
+
+
+async def _fetch_reverse(key: str):
+    lat, lon = key.split(",")
     params = {"lat": lat, "lon": lon, "format": "json"}
     
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.get(NOMINATIM_REVERSE_URL, params=params, headers={"User-Agent": USER_AGENT})
-            
+        geocode_cache.upstream_fetches += 1
+        res = await get_http_client().get(NOMINATIM_REVERSE_URL, params=params, headers={"User-Agent": USER_AGENT})
+
         if res.status_code == 200:
             data = res.json()
             address = data.get("address", {})
@@ -82,60 +117,79 @@ async def reverse_geocode_coordinates(lat: float, lon: float):
     return None
 
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points in km"""
-    R = 6371  # Earth radius in km
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = (math.sin(dlat / 2) * math.sin(dlat / 2) +
-         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
-         math.sin(dlon / 2) * math.sin(dlon / 2))
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+def location_fields(lat: float, lon: float):
+    """Fields that place an NGO profile or a book on the map and in the geohash index."""
+    return {
+        "coordinates": {"lat": lat, "lon": lon},
+        "geohash": geohash_encode(lat, lon),
+    }
+
+
+async def _scan_all_ngos():
+    async for doc in db.collection("users").where("role", "==", "ngo").stream():
+        yield doc
+
+
+async def _ngos_in_cells(cells: list[str]):
+    """NGOs whose geohash falls in any of `cells`; one range query per cell, run concurrently."""
+    async def query_cell(cell):
+        query = db.collection("users")\
+                  .where(filter=FieldFilter("role", "==", "ngo"))\
+                  .where(filter=FieldFilter("geohash", ">=", cell))\
+                  .where(filter=FieldFilter("geohash", "<", cell + GEOHASH_RANGE_END))
+        return [doc async for doc in query.stream()]
+
+    for docs in await asyncio.gather(*(query_cell(cell) for cell in cells)):
+        for doc in docs:
+            yield doc
 
 
 async def find_nearby_ngos(lat: float, lon: float, radius_km: float = 10.0):
     """Find verified NGOs within radius"""
-    # Note: Firestore doesn't support native geo queries easily without Geohash/external lib.
-    # For MVP (small dataset), we fetch all verified NGOs and filter in memory.
-    # A production app would use Geohashes.
+    # "memory" answers from the in-process NGO coordinate arrays. Otherwise only
+    # the geohash cells covering the search circle are read; exact distance
+    # is computed for those candidates. "scan" mode reads every NGO instead and
+    # is kept for projects whose profiles have not been backfilled with geohashes.
+    if settings.NGO_LOOKUP_MODE == "memory":
+        return await ngo_index.nearest(lat, lon, radius_km)
+    if settings.NGO_LOOKUP_MODE == "scan":
+        docs = _scan_all_ngos()
+    else:
+        docs = _ngos_in_cells(covering_cells(lat, lon, radius_km))
     
-    docs = db.collection("users").where("role", "==", "ngo").stream()
-    
-    results = []
-    for doc in docs:
+    candidates = []
+    async for doc in docs:
         ngo = doc.to_dict()
         
-        # Fallback: if coordinates missing, try to geocode now (and save for later)
+        # Coordinates missing: hand the NGO to the background geocoder and skip it
+        # for now, so this request never waits on an external call.
         if not ngo.get("coordinates"):
             city = ngo.get("city", "")
             area = ngo.get("area", "")
             if city and area:
-                try:
-                    q_lat, q_lon = await geocode_address(f"{area}, {city}")
-                    if q_lat and q_lon:
-                        ngo["coordinates"] = {"lat": q_lat, "lon": q_lon}
-                        # Async update to avoid blocking too much? 
-                        # For now, just fire and forget or await if critical.
-                        db.collection("users").document(doc.id).update({"coordinates": ngo["coordinates"]})
-                except:
-                    pass
-        
-        if not ngo.get("coordinates"):
+                geocoding_worker.enqueue(doc.id, f"{area}, {city}")
             continue
-            
-        ngo_lat = ngo["coordinates"]["lat"]
-        ngo_lon = ngo["coordinates"]["lon"]
-        
-        dist = haversine_distance(lat, lon, ngo_lat, ngo_lon)
-        
+
+        candidates.append((doc.id, ngo))
+
+    if not candidates:
+        return []
+
+    distances = haversine_km(
+        lat, lon,
+        [ngo["coordinates"]["lat"] for _, ngo in candidates],
+        [ngo["coordinates"]["lon"] for _, ngo in candidates],
+    )
+
+    results = []
+    for (uid, ngo), dist in zip(candidates, distances):
         if dist <= radius_km:
             results.append({
-                "uid": doc.id,
+                "uid": uid,
                 "name": ngo.get("organization_name", "Unknown NGO"),
                 "area": ngo.get("area", ""),
                 "city": ngo.get("city", ""),
-                "distance_km": round(dist, 2),
+                "distance_km": round(float(dist), 2),
                 "coordinates": ngo["coordinates"]
             })
             
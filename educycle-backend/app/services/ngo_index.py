@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.core.config import settings
+from app.db.firestore import db
+from app.utils.geo_index import CoordinateIndex
+
+_NGO_FIELDS = ["organization_name", "area", "city", "coordinates"]
+
+
+class NGOIndex:
+    """
+    In-memory coordinates of every placed NGO, refreshed from Firestore at most
+    every `refresh_seconds` (or sooner after mark_stale()), so proximity
+    queries are answered by one vectorized pass instead of a Firestore read.
+    NGOs without coordinates are handed to the geocoding worker on each
+    refresh and show up once it has placed them.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.index = CoordinateIndex()
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    def mark_stale(self):
+        self._loaded_at = None
+
+    async def refresh(self):
+        # Imported here: the geocoding worker imports this module to mark the index stale
+        from app.services.geocoding_worker import geocoding_worker
+
+        query = db.collection("users")\
+                  .where(filter=FieldFilter("role", "==", "ngo"))\
+                  .select(_NGO_FIELDS)
+        items = []
+        async for doc in query.stream():
+            ngo = doc.to_dict()
+            coords = ngo.get("coordinates")
+            if not coords:
+                city = ngo.get("city", "")
+                area = ngo.get("area", "")
+                if city and area:
+                    geocoding_worker.enqueue(doc.id, f"{area}, {city}")
+                continue
+            items.append((doc.id, coords["lat"], coords["lon"], {
+                "uid": doc.id,
+                "name": ngo.get("organization_name", "Unknown NGO"),
+                "area": ngo.get("area", ""),
+                "city": ngo.get("city", ""),
+                "coordinates": coords,
+            }))
+        self.index.load(items)
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                await self.refresh()
+
+    @staticmethod
+    def _as_result(hit):
+        _, distance, payload = hit
+        return {**payload, "distance_km": round(distance, 2)}
+
+    async def nearest(self, lat: float, lon: float, radius_km: float, k: int | None = None):
+        await self.ensure_fresh()
+        return [self._as_result(hit) for hit in self.index.nearest(lat, lon, radius_km, k)]
+
+    async def nearest_many(self, points, radius_km: float, k: int | None = None):
+        """Nearest NGOs for many (lat, lon) points in one call, e.g. for coverage analytics."""
+        await self.ensure_fresh()
+        return [
+            [self._as_result(hit) for hit in hits]
+            for hits in self.index.nearest_many(points, radius_km, k)
+        ]
+
+
+ngo_index = NGOIndex(settings.NGO_INDEX_REFRESH_SECONDS)
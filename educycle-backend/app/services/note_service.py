@@ -1,21 +1,29 @@
 from datetime import datetime
 from app.db.firestore import db
+from app.db.storage import delete_files, stored_file_urls
+from app.services.text_search import note_search
 
 
 async def upload_note(uid: str, payload: dict, file_url: str):
     ref = db.collection("notes").document()
 
-    ref.set({
+    data = {
         **payload,
         "file_url": file_url,
         "owner_uid": uid,
         "created_at": datetime.utcnow(),
-    })
+    }
+    await ref.set(data)
+    note_search.upsert(ref.id, data)
 
     return ref.id
 
 
-async def list_notes(filters: dict):
+async def list_notes(filters: dict, q: str = None):
+    if q:
+        # Ranked by relevance; filters are applied to the text matches
+        return await note_search.search(q, {k: v for k, v in filters.items() if v})
+
     query = db.collection("notes")
 
     for key, value in filters.items():
@@ -23,19 +31,22 @@ async def list_notes(filters: dict):
             query = query.where(key, "==", value)
 
     docs = query.stream()
-    return [{**doc.to_dict(), "id": doc.id} for doc in docs]
+    return [{**doc.to_dict(), "id": doc.id} async for doc in docs]
 
 
 async def delete_note(note_id: str, uid: str):
     ref = db.collection("notes").document(note_id)
-    doc = ref.get()
+    doc = await ref.get()
 
     if not doc.exists:
         return False
 
-    if doc.to_dict().get("owner_uid") != uid:
+    data = doc.to_dict()
+    if data.get("owner_uid") != uid:
         return False
 
-    ref.delete()
+    await ref.delete()
+    note_search.remove(note_id)
+    await delete_files(stored_file_urls(data))
     return True
 
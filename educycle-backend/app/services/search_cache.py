@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.book_catalog import book_catalog
+from app.utils.cache import TTLCache
+
+
+def search_key(filters: dict, q: str | None = None, near: tuple | None = None):
+    """Cache key for a parsed filter set + text query + location; order and spacing don't matter."""
+    normalized_q = " ".join(q.lower().split()) if q else ""
+    return (tuple(sorted(filters.items(), key=lambda item: item[0])), normalized_q, near)
+
+
+class SearchCache:
+    """
+    Ranked /books/search results per normalized filter set, shared by every
+    user (per-user exclusions and paging are applied to the cached list).
+
+    Concurrent misses for the same key share one computation. Any book write,
+    reputation change or catalog update bumps the generation and drops all
+    entries, since one book can appear under many filter combinations; a
+    computation that started before an invalidation is returned to its
+    callers but not cached. Entries also expire after `ttl` as a backstop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+        self._generation = 0
+        self._loop = None
+        self.invalidations = 0
+        self._last_invalidated = None
+        self.shared_misses = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def invalidate(self):
+        self._generation += 1
+        self._cache.clear()
+        self.invalidations += 1
+        self._last_invalidated = time.monotonic()
+
+    def invalidate_threadsafe(self):
+        """invalidate() for callbacks running off the event loop, e.g. the catalog listener."""
+        if self._loop is None:
+            self.invalidate()  # nothing has been cached yet
+            return
+        try:
+            self._loop.call_soon_threadsafe(self.invalidate)
+        except RuntimeError:
+            pass  # loop closed during shutdown
+
+    async def get_or_compute(self, key, compute):
+        self._loop = asyncio.get_running_loop()
+        entry = self._cache.get(key)
+        if entry is not None:
+            computed_at, value = entry
+            age = time.monotonic() - computed_at
+            self._served_age_total += age
+            self._served_age_max = max(self._served_age_max, age)
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            generation = self._generation
+
+            async def run():
+                try:
+                    computed_at = time.monotonic()
+                    value = await compute()
+                    if generation == self._generation:
+                        self._cache.set(key, (computed_at, value))
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+
+            task = asyncio.ensure_future(run())
+            self._inflight[key] = task
+        else:
+            self.shared_misses += 1
+        # Shield so one caller giving up doesn't cancel the computation for the others.
+        return await asyncio.shield(task)
+
+    def stats(self):
+        stats = self._cache.stats()
+        return {
+            **stats,
+            "inflight": len(self._inflight),
+            "shared_misses": self.shared_misses,
+            "invalidations": self.invalidations,
+            "seconds_since_invalidation": (
+                round(time.monotonic() - self._last_invalidated, 1) if self._last_invalidated else None
+            ),
+            # Age of cached results when served: how stale a hit can be
+            "served_age_avg_seconds": round(self._served_age_total / stats["hits"], 3) if stats["hits"] else 0.0,
+            "served_age_max_seconds": round(self._served_age_max, 3),
+        }
+
+
+search_cache = SearchCache(settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL_SECONDS)
+# Writes from other instances reach us through the catalog's snapshot listener
+book_catalog.add_listener(lambda book_ids: search_cache.invalidate_threadsafe())
@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+from app.core.config import settings
+from app.db.firestore import db
+from app.services.book_catalog import book_catalog
+from app.utils.text_index import TextIndex
+
+# Indexed fields and how many times each token counts toward term frequency
+BOOK_FIELDS = {"title": 3, "description": 1}
+NOTE_FIELDS = {"title": 3, "subject": 2}
+
+
+def _text_fields(doc: dict, fields: dict) -> dict:
+    return {field: doc.get(field) for field in fields}
+
+
+# Books: follows the in-memory catalog, so donations, status changes and
+# deletions are reflected as soon as the snapshot listener delivers them.
+book_text_index = TextIndex(BOOK_FIELDS)
+
+
+def _sync_books(book_ids):
+    for book_id in book_ids:
+        book = book_catalog.get(book_id)
+        if book is None:
+            book_text_index.remove(book_id)
+        else:
+            book_text_index.add(book_id, _text_fields(book, BOOK_FIELDS))
+
+
+book_catalog.add_listener(_sync_books)
+
+
+def rank_books(items: list[dict], q: str) -> dict:
+    """doc id -> relevance for `items` when the live index isn't loaded (Firestore fallback)."""
+    index = TextIndex(BOOK_FIELDS)
+    for item in items:
+        index.add(item["id"], _text_fields(item, BOOK_FIELDS))
+    return dict(index.search(q))
+
+
+class NoteSearch:
+    """
+    Text index over notes plus their metadata, loaded from Firestore on first
+    use and reloaded every `refresh_seconds` to pick up notes written by other
+    instances. Uploads and deletes on this instance apply immediately.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.index = TextIndex(NOTE_FIELDS)
+        self.notes = {}
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    async def refresh(self):
+        index = TextIndex(NOTE_FIELDS)
+        notes = {}
+        async for doc in db.collection("notes").stream():
+            note = {**doc.to_dict(), "id": doc.id}
+            notes[doc.id] = note
+            index.add(doc.id, _text_fields(note, NOTE_FIELDS))
+        self.index, self.notes = index, notes
+        self._loaded_at = time.monotonic()
+
+    async def ensure_fresh(self):
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                await self.refresh()
+
+    def upsert(self, note_id: str, note: dict):
+        if self._loaded_at is None:
+            return  # picked up by the first load
+        self.notes[note_id] = {**note, "id": note_id}
+        self.index.add(note_id, _text_fields(note, NOTE_FIELDS))
+
+    def remove(self, note_id: str):
+        self.notes.pop(note_id, None)
+        self.index.remove(note_id)
+
+    async def search(self, q: str, filters: dict | None = None) -> list[dict]:
+        await self.ensure_fresh()
+        filters = filters or {}
+        results = []
+        for note_id, score in self.index.search(q):
+            note = self.notes.get(note_id)
+            if note is None or any(note.get(key) != value for key, value in filters.items()):
+                continue
+            results.append({**note, "relevance": score})
+        return results
+
+    async def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        await self.ensure_fresh()
+        return self.index.complete(prefix, limit)
+
+
+note_search = NoteSearch(settings.NOTE_INDEX_REFRESH_SECONDS)
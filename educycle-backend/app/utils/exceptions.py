@@ -0,0 +1,7 @@
+class UploadTooLarge(Exception):
+    """An upload stream went past the size limit for its content type (HTTP 413)."""
+
+    def __init__(self, content_type: str, limit: int):
+        self.content_type = content_type
+        self.limit = limit
+        super().__init__(f"File too large: {content_type or 'file'} uploads are limited to {limit // (1024 * 1024)} MB")
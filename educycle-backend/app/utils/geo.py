@@ -0,0 +1,109 @@
+import math
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = 111.32
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+# Sorts after every geohash character, so [cell, cell + GEOHASH_RANGE_END) is a prefix range.
+GEOHASH_RANGE_END = "~"
+DEFAULT_GEOHASH_PRECISION = 9
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points in km"""
+    R = EARTH_RADIUS_KM
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (math.sin(dlat / 2) * math.sin(dlat / 2) +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dlon / 2) * math.sin(dlon / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return R * c
+
+
+def geohash_encode(lat: float, lon: float, precision: int = DEFAULT_GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int):
+    """(lat_degrees, lon_degrees) spanned by one cell at `precision`."""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def geohash_decode(geohash: str):
+    """Center (lat, lon) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def precision_for_radius(lat: float, radius_km: float) -> int:
+    """
+    Finest precision whose cells are at least `radius_km` across at this
+    latitude, so the center cell plus its 8 neighbours cover the circle.
+    """
+    lon_scale = max(math.cos(math.radians(lat)), 0.01)
+    for precision in range(DEFAULT_GEOHASH_PRECISION, 0, -1):
+        lat_deg, lon_deg = geohash_cell_size(precision)
+        if min(lat_deg * KM_PER_DEGREE, lon_deg * KM_PER_DEGREE * lon_scale) >= radius_km:
+            return precision
+    return 1
+
+
+def covering_cells(lat: float, lon: float, radius_km: float) -> list[str]:
+    """Geohash cells (center + neighbours) that together contain the search circle."""
+    precision = precision_for_radius(lat, radius_km)
+    center = geohash_encode(lat, lon, precision)
+    c_lat, c_lon = geohash_decode(center)
+    lat_deg, lon_deg = geohash_cell_size(precision)
+
+    cells = []
+    for dy in (-1, 0, 1):
+        n_lat = c_lat + dy * lat_deg
+        if not -90.0 < n_lat < 90.0:
+            continue
+        for dx in (-1, 0, 1):
+            n_lon = (c_lon + dx * lon_deg + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(n_lat, n_lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
@@ -0,0 +1,120 @@
+import numpy as np
+
+from app.utils.geo import EARTH_RADIUS_KM
+
+# Candidate distances nearest_many() computes per NumPy pass (keeps the temporaries in cache)
+BATCH_CANDIDATES = 32_000
+
+
+def haversine_km(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """Distances in km from one point to arrays of points (all in degrees)."""
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons, dtype=np.float64)) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class CoordinateIndex:
+    """
+    Points held in contiguous NumPy arrays, sorted by latitude, for vectorized
+    radius and top-k queries. A query first slices the latitude band that can
+    possibly be within the radius (two binary searches), then computes exact
+    haversine distances for that band only.
+
+    Items are (key, lat, lon, payload) tuples; results are
+    (key, distance_km, payload) tuples, nearest first.
+    """
+
+    def __init__(self, items=()):
+        self.load(items)
+
+    def load(self, items):
+        items = sorted(items, key=lambda item: item[1])
+        self.keys = [item[0] for item in items]
+        self.payloads = [item[3] for item in items]
+        self._lat = np.radians(np.fromiter((item[1] for item in items), dtype=np.float64, count=len(items)))
+        self._lon = np.radians(np.fromiter((item[2] for item in items), dtype=np.float64, count=len(items)))
+        self._cos_lat = np.cos(self._lat)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nearest(self, lat: float, lon: float, radius_km: float, k: int | None = None):
+        if not self.keys:
+            return []
+
+        q_lat = np.radians(lat)
+        q_lon = np.radians(lon)
+        # Great-circle distance is never less than the latitude difference alone.
+        band = radius_km / EARTH_RADIUS_KM
+        lo = np.searchsorted(self._lat, q_lat - band, side="left")
+        hi = np.searchsorted(self._lat, q_lat + band, side="right")
+        if lo == hi:
+            return []
+
+        dlat = self._lat[lo:hi] - q_lat
+        dlon = self._lon[lo:hi] - q_lon
+        a = np.sin(dlat / 2) ** 2 + np.cos(q_lat) * self._cos_lat[lo:hi] * np.sin(dlon / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+        idx = np.flatnonzero(distances <= radius_km)
+        if k is not None and len(idx) > k:
+            idx = idx[np.argpartition(distances[idx], k - 1)[:k]]
+        idx = idx[np.argsort(distances[idx], kind="stable")]
+        return [(self.keys[lo + i], float(distances[i]), self.payloads[lo + i]) for i in idx]
+
+    def nearest_many(self, points, radius_km: float, k: int | None = None):
+        """
+        Batch form of nearest(): one result list per (lat, lon) point. Every
+        query's latitude band is gathered into one flat array of
+        (query, candidate) pairs, so the distances, radius filter and per-query
+        ordering are each a single NumPy pass (per block of at most
+        BATCH_CANDIDATES candidates) instead of one call per point.
+        """
+        points = np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+        results = [[] for _ in range(len(points))]
+        if not self.keys or not len(points):
+            return results
+
+        band = radius_km / EARTH_RADIUS_KM
+        los = np.searchsorted(self._lat, points[:, 0] - band, side="left")
+        sizes = np.searchsorted(self._lat, points[:, 0] + band, side="right") - los
+        ends = np.cumsum(sizes)
+
+        start = 0
+        while start < len(points):
+            end = max(start + 1, int(np.searchsorted(ends, ends[start] - sizes[start] + BATCH_CANDIDATES, side="right")))
+            block_sizes = sizes[start:end]
+            # Candidate i of query q is point los[q] + i
+            query = np.repeat(np.arange(start, end), block_sizes)
+            cand = np.arange(block_sizes.sum()) - np.repeat(np.cumsum(block_sizes) - block_sizes - los[start:end], block_sizes)
+
+            q_lat = points[query, 0]
+            dlat = self._lat[cand] - q_lat
+            dlon = self._lon[cand] - points[query, 1]
+            a = np.sin(dlat / 2) ** 2 + np.cos(q_lat) * self._cos_lat[cand] * np.sin(dlon / 2) ** 2
+            distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+            keep = distances <= radius_km
+            query, cand, distances = query[keep], cand[keep], distances[keep]
+            # By query, then distance; stable, so ties keep latitude order as in nearest()
+            order = np.lexsort((distances, query))
+            query, cand, distances = query[order], cand[order], distances[order]
+            counts = np.bincount(query - start, minlength=end - start)
+            if k is not None:
+                rank = np.arange(len(query)) - (np.cumsum(counts) - counts)[query - start]
+                cand, distances = cand[rank < k], distances[rank < k]
+                counts = np.minimum(counts, k)
+
+            cand, distances = cand.tolist(), distances.tolist()
+            pos = 0
+            for row, count in enumerate(counts.tolist(), start):
+                results[row] = [
+                    (self.keys[i], d, self.payloads[i])
+                    for i, d in zip(cand[pos:pos + count], distances[pos:pos + count])
+                ]
+                pos += count
+            start = end
+        return results
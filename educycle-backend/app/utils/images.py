@@ -0,0 +1,39 @@
+import io
+import math
+
+# Variant name -> longest edge in pixels. Images are only ever scaled down.
+VARIANTS = {"thumb": 240, "card": 640, "full": 1600}
+WEBP_QUALITY = {"thumb": 70, "card": 78, "full": 82}
+
+
+def make_variants(data: bytes) -> dict[str, bytes]:
+    """
+    Decode an uploaded photo and encode each VARIANTS size as WebP.
+
+    Orientation from EXIF is applied to the pixels first; nothing else from
+    the original (EXIF, GPS, ICC, XMP) is written out. Runs in worker
+    processes, so it takes and returns plain bytes.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        # Let the JPEG decoder downscale (by 1/2, 1/4, 1/8) while decoding,
+        # as long as the result still covers the largest variant.
+        ratio = max(VARIANTS.values()) / max(original.size)
+        if ratio < 1:
+            original.draft("RGB", (math.ceil(original.width * ratio), math.ceil(original.height * ratio)))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    variants = {}
+    # Largest first, each derived from the previous one: cheaper than
+    # resampling the full-resolution original three times.
+    source = image
+    for name, edge in sorted(VARIANTS.items(), key=lambda item: item[1], reverse=True):
+        resized = source.copy()
+        resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        resized.save(out, "WEBP", quality=WEBP_QUALITY[name], method=4)
+        variants[name] = out.getvalue()
+        source = resized
+    return variants
@@ -0,0 +1,188 @@
+import asyncio
+import mimetypes
+import os
+import re
+import stat
+from datetime import timezone
+from email.utils import formatdate, parsedate_to_datetime
+
+# Photo variants are stored as .webp, which older mimetypes tables don't know
+mimetypes.add_type("image/webp", ".webp")
+
+READ_CHUNK = 256 * 1024
+# Content-addressed uploads (<sha256>.<ext>) never change under the same name
+HASHED_NAME = re.compile(r"^([0-9a-f]{64})\.[A-Za-z0-9.+-]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+# Upload extensions are MIME subtypes ("pdf", "plain", "jpeg"); map the ones mimetypes misses
+EXTRA_TYPES = {"plain": "text/plain", "octet-stream": "application/octet-stream"}
+RANGE_SPEC = re.compile(r"\s*(\d*)-(\d*)\s*")
+
+
+def _parse_range(header: str, size: int):
+    """
+    (start, end_exclusive) for a single `bytes=` range, or None to ignore the
+    header and send the whole file. Raises ValueError if it can't be satisfied.
+    """
+    units, _, spec = header.partition("=")
+    match = RANGE_SPEC.fullmatch(spec)
+    # Multiple ranges are answered with the whole file, which RFC 9110 allows
+    if units.strip().lower() != "bytes" or not match or not (match[1] or match[2]):
+        return None
+    if match[1]:
+        start = int(match[1])
+        if match[2] and int(match[2]) < start:
+            return None
+        end = min(int(match[2]) + 1, size) if match[2] else size
+    else:
+        suffix = int(match[2])
+        if suffix == 0:
+            raise ValueError("empty suffix range")
+        start, end = max(size - suffix, 0), size
+    if start >= size:
+        raise ValueError("range starts past the end of the file")
+    return start, end
+
+
+class UploadFiles:
+    """
+    ASGI app serving the local upload directory (the storage fallback).
+
+    Compared with a plain StaticFiles mount: content-hashed names get a
+    strong ETag (the SHA-256 itself) and a year-long immutable Cache-Control,
+    so browsers stop re-downloading photos on every page view; other files
+    are revalidated with If-None-Match / If-Modified-Since and answered
+    with 304. A single `Range` is honoured with 206 so PDF viewers can fetch
+    notes page by page. Bodies go out with the ASGI zerocopy (sendfile)
+    extension when the server offers it, else in READ_CHUNK reads off the
+    event loop.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.realpath(directory)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._send_status(send, 405, {"allow": "GET, HEAD"})
+            return
+
+        path, root = scope["path"], scope.get("root_path", "")
+        # Mounted: the path still carries the mount prefix, which root_path names
+        name = (path[len(root):] if root and path.startswith(root) else path).lstrip("/")
+        # Uploads are stored flat; anything with a separator is not ours
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            await self._send_status(send, 404)
+            return
+        path = os.path.join(self.directory, name)
+        try:
+            info = await asyncio.to_thread(os.stat, path)
+        except (OSError, ValueError):  # ValueError: embedded NUL byte
+            info = None
+        if info is None or not stat.S_ISREG(info.st_mode):
+            await self._send_status(send, 404)
+            return
+
+        request = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        hashed = HASHED_NAME.match(name)
+        etag = f'"{hashed.group(1)}"' if hashed else f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+        last_modified = formatdate(info.st_mtime, usegmt=True)
+        headers = {
+            "etag": etag,
+            "last-modified": last_modified,
+            "cache-control": IMMUTABLE if hashed else REVALIDATE,
+            "accept-ranges": "bytes",
+        }
+
+        if self._not_modified(request, etag, info.st_mtime):
+            await self._send_status(send, 304, headers)
+            return
+
+        size = info.st_size
+        start, end, status = 0, size, 200
+        range_header = request.get("range")
+        if range_header and self._if_range_matches(request.get("if-range"), etag, last_modified):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except ValueError:
+                await self._send_status(send, 416, {**headers, "content-range": f"bytes */{size}"})
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = 206
+                headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+
+        ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+        content_type = mimetypes.guess_type(name)[0] or EXTRA_TYPES.get(ext, "application/octet-stream")
+        headers["content-type"] = content_type
+        headers["content-length"] = str(end - start)
+        await send({"type": "http.response.start", "status": status, "headers": self._encode(headers)})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_file(scope, send, path, start, end)
+
+    @staticmethod
+    def _not_modified(request: dict, etag: str, mtime: float):
+        if_none_match = request.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = request.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+                if since.tzinfo is None:
+                    # "-0000" and obsolete zone names parse as naive; HTTP dates are GMT
+                    since = since.replace(tzinfo=timezone.utc)
+                return int(mtime) <= since.timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _if_range_matches(if_range: str | None, etag: str, last_modified: str):
+        # If-Range needs a strong match; otherwise the client gets the whole (changed) file
+        return if_range is None or if_range == etag or if_range == last_modified
+
+    async def _send_file(self, scope, send, path: str, start: int, end: int):
+        f = await asyncio.to_thread(open, path, "rb")
+        try:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f,
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": False,
+                })
+                return
+            if start:
+                await asyncio.to_thread(f.seek, start)
+            position = start
+            while position < end:
+                chunk = await asyncio.to_thread(f.read, min(READ_CHUNK, end - position))
+                if not chunk:
+                    break  # file shrank underneath us; the client sees a short body
+                position += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": position < end})
+            if position == start or position < end:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            f.close()
+
+    @classmethod
+    async def _send_status(cls, send, status: int, headers: dict = None):
+        headers = dict(headers or {})
+        body = b"" if status == 304 else {404: b"Not Found", 405: b"Method Not Allowed", 416: b"Range Not Satisfiable"}.get(status, b"")
+        if status != 304:
+            headers["content-type"] = "text/plain; charset=utf-8"
+            headers["content-length"] = str(len(body))
+        await send({"type": "http.response.start", "status": status, "headers": cls._encode(headers)})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _encode(headers: dict):
+        return [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
@@ -0,0 +1,243 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset({"a", "an", "and", "the", "of", "for", "to", "in", "on", "with", "by"})
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Score multipliers for query terms that were matched loosely
+PREFIX_WEIGHT = 0.9
+FUZZY_WEIGHT = 0.7
+# Typo tolerance only kicks in for terms at least this long
+MIN_FUZZY_LENGTH = 4
+MAX_EXPANSIONS = 10
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class TextIndex:
+    """
+    Incremental BM25 inverted index with typo tolerance and prefix completion.
+
+    Documents are added as {field: text}; each field's tokens count `weight`
+    times toward term frequency, so titles can outrank descriptions. Query
+    terms missing from the vocabulary are matched to close vocabulary terms
+    through a trigram index (edit distance 1, or 2 for long words), and the
+    last query term is also matched as a prefix so results show up while the
+    user is still typing.
+
+    Every query term must match (AND); if that leaves nothing, documents
+    matching any term are ranked instead. Safe to update from a listener
+    thread while queries run on the event loop.
+    """
+
+    def __init__(self, field_weights: dict[str, int] | None = None):
+        self.field_weights = field_weights or {}
+        self._postings = defaultdict(dict)  # term -> {doc_id: tf}
+        self._doc_terms = {}                # doc_id -> {term: tf}
+        self._doc_len = {}
+        self._total_len = 0
+        self._vocab = []                    # sorted, for prefix ranges
+        self._trigrams = defaultdict(set)   # trigram -> terms
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _analyze(self, fields: dict) -> dict:
+        tf = defaultdict(int)
+        for field, text in fields.items():
+            if not text:
+                continue
+            weight = self.field_weights.get(field, 1)
+            for token in tokenize(str(text)):
+                tf[token] += weight
+        return tf
+
+    def _add_term(self, term: str):
+        bisect.insort(self._vocab, term)
+        for gram in trigrams(term):
+            self._trigrams[gram].add(term)
+
+    def _drop_term(self, term: str):
+        del self._postings[term]
+        i = bisect.bisect_left(self._vocab, term)
+        if i < len(self._vocab) and self._vocab[i] == term:
+            del self._vocab[i]
+        for gram in trigrams(term):
+            terms = self._trigrams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._trigrams[gram]
+
+    def add(self, doc_id: str, fields: dict):
+        """Index (or re-index) a document."""
+        tf = self._analyze(fields)
+        with self._lock:
+            self.remove(doc_id)
+            for term, count in tf.items():
+                if term not in self._postings:
+                    self._add_term(term)
+                self._postings[term][doc_id] = count
+            self._doc_terms[doc_id] = dict(tf)
+            length = sum(tf.values())
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            for term in terms:
+                postings = self._postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    self._drop_term(term)
+            self._total_len -= self._doc_len.pop(doc_id)
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._total_len = 0
+            self._vocab = []
+            self._trigrams.clear()
+
+    def _prefix_terms(self, prefix: str, limit: int):
+        """Vocabulary terms starting with `prefix`, most common first."""
+        start = bisect.bisect_left(self._vocab, prefix)
+        end = bisect.bisect_left(self._vocab, prefix + "\uffff")
+        # Short prefixes can match thousands of terms; rank a bounded slice.
+        candidates = self._vocab[start:min(end, start + 2000)]
+        candidates.sort(key=lambda t: len(self._postings[t]), reverse=True)
+        return candidates[:limit]
+
+    def _fuzzy_terms(self, term: str, limit: int):
+        max_edits = 1 if len(term) <= 6 else 2
+        shared = defaultdict(int)
+        for gram in trigrams(term):
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] += 1
+        ranked = sorted(shared, key=shared.get, reverse=True)[:limit * 5]
+        matches = [(c, d) for c in ranked if (d := edit_distance(term, c, max_edits)) <= max_edits]
+        matches.sort(key=lambda m: (m[1], -len(self._postings[m[0]])))
+        return [c for c, _ in matches[:limit]]
+
+    def _expand(self, term: str, is_last: bool):
+        """(vocabulary term, weight) pairs a query term should match."""
+        expansions = {}
+        if term in self._postings:
+            expansions[term] = 1.0
+        if is_last:
+            for t in self._prefix_terms(term, MAX_EXPANSIONS):
+                expansions.setdefault(t, PREFIX_WEIGHT)
+        if not expansions and len(term) >= MIN_FUZZY_LENGTH:
+            for t in self._fuzzy_terms(term, MAX_EXPANSIONS):
+                expansions.setdefault(t, FUZZY_WEIGHT)
+        return expansions
+
+    def _bm25(self, postings: dict, weight: float, candidates: set, scores: dict):
+        """Keep the best BM25 contribution per candidate doc in `scores`."""
+        n = len(self._doc_terms)
+        df = len(postings)
+        idf = weight * math.log(1 + (n - df + 0.5) / (df + 0.5)) * (K1 + 1)
+        k_len = K1 * B / (self._total_len / n)
+        k_base = K1 * (1 - B)
+        doc_len = self._doc_len
+        if df < len(candidates):
+            pairs = ((d, tf) for d, tf in postings.items() if d in candidates)
+        else:
+            pairs = ((d, postings[d]) for d in candidates if d in postings)
+        for doc_id, tf in pairs:
+            score = idf * tf / (tf + k_base + k_len * doc_len[doc_id])
+            if score > scores.get(doc_id, 0.0):
+                scores[doc_id] = score
+
+    def _match_all(self, expanded) -> set:
+        """Docs matching every query term (any of its expansions), narrowing from the rarest term."""
+        by_size = sorted(
+            ([self._postings[t] for t in expansions] for expansions in expanded),
+            key=lambda plists: sum(len(p) for p in plists),
+        )
+        candidates = set().union(*(p.keys() for p in by_size[0]))
+        for plists in by_size[1:]:
+            if not candidates:
+                break
+            if len(plists) == 1 and len(plists[0]) <= 4 * len(candidates):
+                candidates = candidates.intersection(plists[0])
+            else:
+                candidates = {d for d in candidates if any(d in p for p in plists)}
+        return candidates
+
+    def search(self, query: str, limit: int | None = None) -> list[tuple[str, float]]:
+        """(doc_id, score) pairs, best first; all matches when limit is None."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self._doc_terms:
+                return []
+            expanded = [self._expand(term, i == len(terms) - 1) for i, term in enumerate(terms)]
+            expanded = [e for e in expanded if e]
+            if not expanded:
+                return []
+
+            candidates = self._match_all(expanded)
+            if not candidates:
+                candidates = set().union(*(self._postings[t].keys() for e in expanded for t in e))
+
+            totals = defaultdict(float)
+            for expansions in expanded:
+                best = {}
+                for term, weight in expansions.items():
+                    postings = self._postings[term]
+                    self._bm25(postings, weight, candidates, best)
+                for doc_id, score in best.items():
+                    totals[doc_id] += score
+
+        order = lambda item: (-item[1], item[0])
+        if limit is not None:
+            return heapq.nsmallest(limit, totals.items(), key=order)
+        return sorted(totals.items(), key=order)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """Query completions for a partially typed query, e.g. 'ncert phy' -> 'ncert physics'."""
+        terms = tokenize(prefix)
+        if not terms or not prefix[-1:].isalnum():
+            return []
+        head = " ".join(terms[:-1])
+        with self._lock:
+            completions = self._prefix_terms(terms[-1], limit)
+        return [f"{head} {t}".strip() for t in completions]
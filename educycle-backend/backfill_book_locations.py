@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app modules
+sys.path.append(os.getcwd())
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+from app.db.firestore import db
+from app.services.geocoding_worker import geocoding_worker
+
+# Geocodes in flight at once (Nominatim requests themselves are still paced at 1 req/s)
+DEFAULT_CONCURRENCY = 4
+
+
+async def place_books(concurrency: int = DEFAULT_CONCURRENCY):
+    """Give available books without coordinates a location from their area/city, for radius search."""
+    print("Fetching available books...")
+    docs = db.collection("books").where(filter=FieldFilter("available", "==", True)).stream()
+
+    jobs = []
+    async for doc in docs:
+        book = doc.to_dict()
+        if book.get("geohash"):
+            continue
+        address = ", ".join(part for part in (book.get("area"), book.get("city")) if part)
+        if not address:
+            print(f"⚠️ {book.get('title', 'Untitled')} ({doc.id}) has no area/city. Skipping.")
+            continue
+        jobs.append((doc.id, address))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(book_id, address):
+        async with semaphore:
+            try:
+                return await geocoding_worker.geocode_book(book_id, address)
+            except Exception as e:
+                print(f"   ❌ Error geocoding {book_id} ({address}): {e}")
+                return False
+
+    print(f"Geocoding {len(jobs)} books ({concurrency} at a time)...")
+    results = await asyncio.gather(*(one(book_id, address) for book_id, address in jobs))
+    placed = sum(1 for ok in results if ok)
+    print(f"\nDone! Placed {placed} books, could not geocode {len(jobs) - placed}.")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONCURRENCY
+    asyncio.run(place_books(concurrency))
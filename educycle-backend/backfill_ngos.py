@@ -6,23 +6,37 @@ import os
 sys.path.append(os.getcwd())
 
 from app.db.firestore import db
-from app.services.location_service import geocode_address
+from app.db.firestore import invalidate_user
+from app.services.geocoding_worker import geocoding_worker
+from app.services.location_service import location_fields
 
-async def fix_ngos():
+# Geocodes in flight at once (Nominatim requests themselves are still paced at 1 req/s)
+DEFAULT_CONCURRENCY = 4
+
+
+async def fix_ngos(concurrency: int = DEFAULT_CONCURRENCY):
     print("Fetching NGOs...")
     docs = db.collection("users").where("role", "==", "ngo").stream()
     
     count = 0
     updated = 0
+    jobs = []
     
-    for doc in docs:
+    async for doc in docs:
         count += 1
         ngo = doc.to_dict()
         uid = doc.id
         name = ngo.get("organization_name", "Unknown")
         
         if ngo.get("coordinates"):
-            print(f"✅ {name} ({uid}) already has coordinates.")
+            if ngo.get("geohash"):
+                print(f"✅ {name} ({uid}) already has coordinates.")
+            else:
+                coords = ngo["coordinates"]
+                await db.collection("users").document(uid).update(location_fields(coords["lat"], coords["lon"]))
+                invalidate_user(uid)
+                print(f"🧭 {name} ({uid}) indexed by geohash.")
+                updated += 1
             continue
             
         city = ngo.get("city", "")
@@ -33,25 +47,17 @@ async def fix_ngos():
             continue
             
         address = f"{area}, {city}"
-        print(f"📍 Geocoding {name}: {address}...")
-        
-        try:
-            lat, lon = await geocode_address(address)
-            if lat and lon:
-                print(f"   -> Found: {lat}, {lon}")
-                db.collection("users").document(uid).update({
-                    "coordinates": {
-                        "lat": lat,
-                        "lon": lon
-                    }
-                })
-                updated += 1
-            else:
-                print(f"   ❌ Could not geocode address: {address}")
-        except Exception as e:
-            print(f"   ❌ Error geocoding: {e}")
+        print(f"📍 Queued {name}: {address}")
+        jobs.append((uid, address))
+
+    if jobs:
+        print(f"\nGeocoding {len(jobs)} NGOs ({concurrency} at a time)...")
+        placed = await geocoding_worker.run_batch(jobs, concurrency=concurrency)
+        print(f"   -> Placed {placed}, could not geocode {len(jobs) - placed}")
+        updated += placed
             
     print(f"\nDone! Processed {count} NGOs, updated {updated}.")
 
 if __name__ == "__main__":
-    asyncio.run(fix_ngos())
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CONCURRENCY
+    asyncio.run(fix_ngos(concurrency))
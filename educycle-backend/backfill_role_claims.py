@@ -0,0 +1,73 @@
+"""
+Backfill the `role` custom claim for existing users so student_only/ngo_only
+can authorize straight from the ID token.
+
+Users are read from Firestore in pages, their current claims are fetched with
+one get_users() call per BATCH_SIZE uids, and only accounts whose claim is
+missing or stale are updated, CONCURRENCY at a time.
+
+Usage:
+    python backfill_role_claims.py [--dry-run]
+"""
+import asyncio
+import sys
+import os
+
+sys.path.append(os.getcwd())
+
+from firebase_admin import auth
+from app.db.firestore import db
+
+BATCH_SIZE = 100  # get_users() accepts at most 100 identifiers
+CONCURRENCY = 10
+
+
+async def process_batch(batch, semaphore, dry_run, totals):
+    roles = dict(batch)
+    result = await asyncio.to_thread(auth.get_users, [auth.UidIdentifier(uid) for uid in roles])
+
+    for missing in result.not_found:
+        print(f"   ⚠️ {missing.uid} has a profile but no auth account. Skipping.")
+        totals["skipped"] += 1
+
+    async def update(user):
+        claims = dict(user.custom_claims or {})
+        role = roles[user.uid]
+        if claims.get("role") == role:
+            totals["unchanged"] += 1
+            return
+        claims["role"] = role
+        if not dry_run:
+            async with semaphore:
+                await asyncio.to_thread(auth.set_custom_user_claims, user.uid, claims)
+        totals["updated"] += 1
+
+    await asyncio.gather(*(update(user) for user in result.users))
+
+
+async def backfill(dry_run: bool = False):
+    print(f"Backfilling role claims{' (dry run)' if dry_run else ''}...")
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    totals = {"updated": 0, "unchanged": 0, "skipped": 0}
+    pending = []
+    batch = []
+
+    async for doc in db.collection("users").select(["role"]).stream():
+        role = (doc.to_dict() or {}).get("role")
+        if not role:
+            totals["skipped"] += 1
+            continue
+        batch.append((doc.id, role))
+        if len(batch) == BATCH_SIZE:
+            pending.append(asyncio.create_task(process_batch(batch, semaphore, dry_run, totals)))
+            batch = []
+
+    if batch:
+        pending.append(asyncio.create_task(process_batch(batch, semaphore, dry_run, totals)))
+    await asyncio.gather(*pending)
+
+    print(f"\nDone! Updated {totals['updated']}, already correct {totals['unchanged']}, skipped {totals['skipped']}.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(dry_run="--dry-run" in sys.argv))
@@ -0,0 +1,35 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app modules
+sys.path.append(os.getcwd())
+
+from app.db.firestore import db
+from app.services.book_service import sync_donor_visibility
+
+
+async def backfill():
+    """Stamp visibility_score / donor_reputation on every book, one donor at a time."""
+    print("Collecting donors...")
+    docs = db.collection("books")\
+             .select(["donor_uid"])\
+             .stream()
+    donor_uids = {doc.to_dict().get("donor_uid") async for doc in docs}
+    donor_uids.discard(None)
+
+    books = 0
+    for uid in donor_uids:
+        profile = await db.collection("users").document(uid).get()
+        data = profile.to_dict() if profile.exists else {}
+        reputation = data.get("reputation", 5.0)
+        mismatch_count = data.get("mismatch_count", 0)
+        updated = await sync_donor_visibility(uid, reputation, mismatch_count)
+        print(f"✅ {uid}: reputation {reputation}, {mismatch_count} mismatches -> {updated} books")
+        books += updated
+
+    print(f"\nDone! Updated {books} books across {len(donor_uids)} donors.")
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
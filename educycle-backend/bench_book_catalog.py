@@ -0,0 +1,108 @@
+"""
+Benchmark: in-memory BookCatalog facet queries and memory footprint.
+
+Loads N synthetic available books into a BookCatalog, reports the memory the
+catalog holds (tracemalloc, normalised per 100k books), then times common
+filter combinations answered by set intersection against a linear scan.
+
+Usage:
+    python bench_book_catalog.py [books]
+"""
+import random
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+from app.services.book_catalog import BookCatalog
+
+BOOKS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+QUERIES = 200
+
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Biology", "English", "History", "Geography", "Computer Science"]
+CLASSES = [str(n) for n in range(1, 13)]
+BOARDS = ["CBSE", "ICSE", "State Board"]
+CITIES = ["Chennai", "Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Pune", "Kolkata", "Coimbatore"]
+AREAS = [f"Area {n}" for n in range(40)]
+CONDITIONS = ["new", "good", "fair", "worn"]
+
+
+def make_book(rng, i):
+    return {
+        "title": f"{rng.choice(SUBJECTS)} for Class {rng.choice(CLASSES)} (vol {i % 5})",
+        "description": "Gently used, a few pencil marks in the margins.",
+        "subject": rng.choice(SUBJECTS),
+        "class_level": rng.choice(CLASSES),
+        "board": rng.choice(BOARDS),
+        "city": rng.choice(CITIES),
+        "area": rng.choice(AREAS),
+        "condition": rng.choice(CONDITIONS),
+        "is_set": rng.random() < 0.2,
+        "donor_uid": f"donor-{rng.randrange(BOOKS // 10 or 1)}",
+        "donor_name": "Donor",
+        "image_urls": ["/static/uploads/example.jpg"],
+        "status": "available",
+        "available": True,
+    }
+
+
+def random_filters(rng):
+    filters = {"city": rng.choice(CITIES), "subject": rng.choice(SUBJECTS)}
+    if rng.random() < 0.5:
+        filters["class_level"] = rng.choice(CLASSES)
+    if rng.random() < 0.3:
+        filters["board"] = rng.choice(BOARDS)
+    if rng.random() < 0.3:
+        filters["is_set"] = rng.random() < 0.5
+    return filters
+
+
+def scan(books, filters):
+    return [
+        {**book, "id": book_id}
+        for book_id, book in books
+        if all(book.get(key) == value for key, value in filters.items())
+    ]
+
+
+def main():
+    rng = random.Random(12)
+    books = [(f"book-{i}", make_book(rng, i)) for i in range(BOOKS)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    catalog = BookCatalog()
+    catalog.load(books)
+    load_s = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"Loaded {len(catalog):,} books in {load_s:.2f}s")
+    print(f"Catalog memory: {held / 2**20:.1f} MiB "
+          f"({held / 2**20 * 100_000 / BOOKS:.1f} MiB per 100k books, "
+          f"{held / BOOKS:.0f} B/book; includes the book dicts themselves)")
+
+    filters = [random_filters(rng) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    expected = [scan(books, f) for f in filters]
+    scan_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    start = time.perf_counter()
+    got = [catalog.query(f) for f in filters]
+    index_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+    for want, have in zip(expected, got):
+        assert sorted(b["id"] for b in want) == sorted(b["id"] for b in have)
+
+    avg_hits = sum(len(r) for r in got) / QUERIES
+    print(f"Queries: {QUERIES}, avg {avg_hits:.0f} hits")
+    print(f"  linear scan : {scan_ms:8.3f} ms/query")
+    print(f"  catalog     : {index_ms:8.3f} ms/query ({scan_ms / index_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
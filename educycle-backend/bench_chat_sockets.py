@@ -0,0 +1,123 @@
+"""
+Load test: chat message fan-out to N concurrent chat sockets.
+
+In-process (default): N subscribers of app.services.chat_hub spread over
+CHATS chats, each drained by its own writer task that JSON-encodes every
+message the way the /chats/{id}/ws endpoint does. MESSAGES messages are
+published to every chat; reports publish->socket latency (p50/p95/p99),
+deliveries/sec, memory per connection and the hub counters.
+
+    python bench_chat_sockets.py [sockets] [chats] [messages]
+
+Live: N real WebSockets against a running server (needs the `websockets`
+package and a participant's Firebase ID token, sent as the "bearer"
+subprotocol like a browser would). Socket 0 sends MESSAGES messages; every
+socket records how long each one took to arrive.
+
+    python bench_chat_sockets.py ws://localhost:8000/chats/<chat_id>/ws <id_token> [sockets] [messages]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+LIVE_URL = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1].startswith("ws") else None
+if LIVE_URL:
+    TOKEN = sys.argv[2]
+    ARGS = [int(a) for a in sys.argv[3:]]
+    SOCKETS, MESSAGES = (ARGS + [200, 20][len(ARGS):])[:2]
+else:
+    ARGS = [int(a) for a in sys.argv[1:]]
+    SOCKETS, CHATS, MESSAGES = (ARGS + [5000, 2500, 20][len(ARGS):])[:3]
+
+
+def report(latencies_ms: list, elapsed: float, deliveries: int):
+    latencies_ms.sort()
+    pick = lambda p: latencies_ms[min(len(latencies_ms) - 1, int(p * len(latencies_ms)))]
+    print(f"  delivered {deliveries:,} messages in {elapsed:.2f}s ({deliveries / elapsed:,.0f}/s)")
+    print(f"  latency p50 {statistics.median(latencies_ms):.2f} ms | p95 {pick(0.95):.2f} ms | p99 {pick(0.99):.2f} ms")
+
+
+async def in_process():
+    from app.services.chat_hub import ChatHub, InMemoryBroker
+
+    hub = ChatHub(InMemoryBroker(), queue_size=100)
+    await hub.start()
+    latencies = []
+    expected = SOCKETS * MESSAGES
+    done = asyncio.Event()
+
+    async def socket_writer(subscription):
+        while True:
+            item = await subscription.get()
+            if item is None:
+                return
+            json.dumps({"type": "message", "message": item})  # what send_json does
+            latencies.append((time.perf_counter() - item["sent"]) * 1000)
+            if len(latencies) == expected:
+                done.set()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscriptions = [await hub.join(f"chat-{i % CHATS}", f"user-{i}") for i in range(SOCKETS)]
+    writers = [asyncio.create_task(socket_writer(s)) for s in subscriptions]
+    await asyncio.sleep(0)
+    per_socket = (tracemalloc.get_traced_memory()[0] - before) / SOCKETS
+    tracemalloc.stop()
+
+    print(f"{SOCKETS:,} sockets over {CHATS:,} chats, {MESSAGES} messages per chat "
+          f"({per_socket / 1024:.1f} KiB per socket incl. writer task)")
+    start = time.perf_counter()
+    for n in range(MESSAGES):
+        for chat in range(CHATS):
+            await hub.publish(f"chat-{chat}", {
+                "chat_id": f"chat-{chat}", "sender_uid": "bench", "message": f"message {n}",
+                "timestamp": "2026-01-01T00:00:00+00:00", "id": f"{chat}-{n}", "sent": time.perf_counter(),
+            })
+        await asyncio.sleep(0)  # let writers drain between rounds, as real sends are spread out
+    await asyncio.wait_for(done.wait(), timeout=120)
+    report(latencies, time.perf_counter() - start, len(latencies))
+    print(f"  hub: {hub.stats()}")
+
+    await hub.stop()
+    await asyncio.gather(*writers)
+
+
+async def live():
+    try:
+        import websockets
+    except ImportError:
+        print("Live mode needs the 'websockets' package: pip install websockets")
+        return
+
+    sockets = [await websockets.connect(LIVE_URL, subprotocols=["bearer", TOKEN], max_queue=None)
+               for _ in range(SOCKETS)]
+    print(f"Connected {len(sockets):,} sockets to {LIVE_URL}")
+    latencies = []
+
+    async def listen(ws):
+        received = 0
+        while received < MESSAGES:
+            event = json.loads(await ws.recv())
+            text = event.get("message", {}).get("message", "")
+            if text.startswith("bench "):
+                latencies.append((time.time() - float(text.split()[1])) * 1000)
+                received += 1
+
+    listeners = [asyncio.create_task(listen(ws)) for ws in sockets]
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        await sockets[0].send(json.dumps({"message": f"bench {time.time()}"}))
+        await asyncio.sleep(0.05)
+    await asyncio.wait_for(asyncio.gather(*listeners), timeout=120)
+    report(latencies, time.perf_counter() - start, len(latencies))
+    await asyncio.gather(*(ws.close() for ws in sockets))
+
+
+if __name__ == "__main__":
+    asyncio.run(live() if LIVE_URL else in_process())
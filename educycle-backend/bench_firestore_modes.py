@@ -0,0 +1,76 @@
+"""
+Benchmark: concurrent Firestore reads in the old blocking style vs the
+thread-pool ("sync") and native AsyncClient ("async") modes of app.db.firestore.
+
+For each mode it fires CONCURRENCY coroutines that each read a user document,
+and measures wall time plus the worst event-loop stall seen by a 5ms heartbeat.
+A blocked loop is what drives p99 up for every other request on the worker.
+
+Usage (point at the emulator or a test project):
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_firestore_modes.py [uid] [concurrency]
+"""
+import asyncio
+import sys
+import os
+import time
+
+sys.path.append(os.getcwd())
+
+from app.core.firebase import get_firestore
+from app.db.firestore import build_client
+
+UID = sys.argv[1] if len(sys.argv) > 1 else "bench-user"
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+
+async def heartbeat(stop: asyncio.Event, stalls: list):
+    interval = 0.005
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        stalls.append(now - last - interval)
+        last = now
+
+
+async def run(label, read_one):
+    stop = asyncio.Event()
+    stalls = []
+    hb = asyncio.create_task(heartbeat(stop, stalls))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(read_one() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await hb
+    worst = max(stalls) * 1000 if stalls else 0.0
+    print(f"{label:<10} | {elapsed * 1000:9.1f} ms total | {CONCURRENCY / elapsed:8.1f} reads/s | worst loop stall {worst:8.1f} ms")
+
+
+async def main():
+    sync_client = get_firestore()
+    sync_client.collection("users").document(UID).set({"uid": UID, "role": "student"}, merge=True)
+
+    async def blocking_read():
+        # What every service did before: a sync call inside an async def.
+        sync_client.collection("users").document(UID).get()
+
+    threaded = build_client("sync")
+    native = build_client("async")
+
+    async def threaded_read():
+        await threaded.collection("users").document(UID).get()
+
+    async def native_read():
+        await native.collection("users").document(UID).get()
+
+    print(f"{CONCURRENCY} concurrent reads of users/{UID}")
+    await run("blocking", blocking_read)
+    await run("sync", threaded_read)
+    await run("async", native_read)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,73 @@
+"""
+Benchmark: WebP variant encoding throughput (app.utils.images.make_variants).
+
+Generates synthetic phone-sized JPEGs (4032x3024, with EXIF), then encodes
+thumb/card/full variants with 1 worker process and with N workers, reporting
+images/sec overall and per core, plus the bytes saved per photo.
+
+Usage:
+    python bench_image_variants.py [images] [workers]
+"""
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.getcwd())
+
+from PIL import Image
+
+from app.utils.images import make_variants
+
+IMAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+SIZE = (4032, 3024)
+
+
+def synthetic_photo(seed: int) -> bytes:
+    rng = random.Random(seed)
+    # Smooth gradient + noise: compresses like a photo, not like a flat test card
+    small = Image.effect_noise((SIZE[0] // 8, SIZE[1] // 8), 60).convert("RGB")
+    tint = Image.new("RGB", small.size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    image = Image.blend(small, tint, 0.5).resize(SIZE, Image.Resampling.BICUBIC)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotate 90
+    exif[0x010F] = "PhoneMaker"
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=92, exif=exif)
+    return out.getvalue()
+
+
+def run(pool_size: int, photos: list[bytes]):
+    with ProcessPoolExecutor(max_workers=pool_size) as pool:
+        list(pool.map(make_variants, photos[:pool_size]))  # warm up workers
+        start = time.perf_counter()
+        results = list(pool.map(make_variants, photos))
+        elapsed = time.perf_counter() - start
+    return elapsed, results
+
+
+def main():
+    print(f"Generating {IMAGES} synthetic {SIZE[0]}x{SIZE[1]} JPEGs...")
+    photos = [synthetic_photo(i) for i in range(IMAGES)]
+    original = sum(len(p) for p in photos) / IMAGES
+
+    for pool_size in sorted({1, WORKERS}):
+        elapsed, results = run(pool_size, photos)
+        rate = IMAGES / elapsed
+        print(f"{pool_size:>2} worker(s): {rate:6.2f} images/s, {rate / pool_size:5.2f} images/s per core, "
+              f"{elapsed * 1000 / IMAGES * pool_size:6.0f} ms CPU per image")
+
+    sizes = {name: sum(len(r[name]) for r in results) / IMAGES for name in results[0]}
+    print(f"\nAverage original: {original / 1024:.0f} KiB")
+    for name, size in sizes.items():
+        print(f"  {name:<5} {size / 1024:7.0f} KiB ({size / original:.1%} of original)")
+
+    sample = Image.open(io.BytesIO(results[0]["full"]))
+    print(f"full variant: {sample.size[0]}x{sample.size[1]}, EXIF bytes kept: {len(sample.info.get('exif', b''))}")
+
+
+if __name__ == "__main__":
+    main()
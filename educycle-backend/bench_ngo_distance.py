@@ -0,0 +1,69 @@
+"""
+Benchmark: scalar haversine loop vs the vectorized NumPy CoordinateIndex.
+
+For 1k, 10k and 100k synthetic NGOs, answers radius queries three ways:
+  - scalar:  haversine_distance() in a Python loop (the old find_nearby_ngos inner loop)
+  - vector:  CoordinateIndex.nearest(), one query at a time
+  - batch:   CoordinateIndex.nearest_many(), all query points in one call
+
+Usage:
+    python bench_ngo_distance.py [queries]
+"""
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.getcwd())
+
+from app.utils.geo import haversine_distance
+from app.utils.geo_index import CoordinateIndex
+
+SIZES = [1_000, 10_000, 100_000]
+RADIUS_KM = 20.0
+QUERIES = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def scalar(ngos, lat, lon):
+    hits = []
+    for uid, n_lat, n_lon in ngos:
+        dist = haversine_distance(lat, lon, n_lat, n_lon)
+        if dist <= RADIUS_KM:
+            hits.append((dist, uid))
+    hits.sort()
+    return [uid for _, uid in hits]
+
+
+def main():
+    rng = random.Random(7)
+    print(f"{'NGOs':>8} | {'scalar ms/q':>11} | {'vector ms/q':>11} | {'batch ms/q':>10} | vector x | batch x")
+    for n in SIZES:
+        ngos = [(f"ngo-{i}", rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for i in range(n)]
+        index = CoordinateIndex((uid, lat, lon, None) for uid, lat, lon in ngos)
+        points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        expected = [scalar(ngos, lat, lon) for lat, lon in points]
+        scalar_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+        start = time.perf_counter()
+        single = [index.nearest(lat, lon, RADIUS_KM) for lat, lon in points]
+        vector_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+        start = time.perf_counter()
+        batched = index.nearest_many(points, RADIUS_KM)
+        batch_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+        for want, got_single, got_batch in zip(expected, single, batched):
+            assert [key for key, _, _ in got_single] == want
+            assert [key for key, _, _ in got_batch] == want
+
+        print(f"{n:>8} | {scalar_ms:>11.3f} | {vector_ms:>11.3f} | {batch_ms:>10.3f} | "
+              f"{scalar_ms / vector_ms:>7.0f}x | {scalar_ms / batch_ms:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: NGO pickup-point lookup, full scan vs geohash-indexed.
+
+Generates synthetic NGOs across India and answers random radius queries two ways:
+  - scan:    haversine against every NGO (what find_nearby_ngos did per call)
+  - geohash: range lookups over a sorted geohash list for the covering cells
+             (the in-memory analogue of the Firestore range queries), then
+             haversine only for those candidates
+
+"docs read" is the number of NGO documents each approach has to pull per query.
+
+Usage:
+    python bench_ngo_lookup.py [queries]
+"""
+import bisect
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.getcwd())
+
+from app.utils.geo import GEOHASH_RANGE_END, covering_cells, geohash_encode, haversine_distance
+
+SIZES = [10_000, 100_000]
+RADII_KM = [5.0, 20.0, 50.0]
+QUERIES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+
+
+def make_ngos(n):
+    rng = random.Random(n)
+    ngos = []
+    for i in range(n):
+        lat = rng.uniform(*LAT_RANGE)
+        lon = rng.uniform(*LON_RANGE)
+        ngos.append((geohash_encode(lat, lon), lat, lon, f"ngo-{i}"))
+    ngos.sort()
+    return ngos
+
+
+def scan(ngos, lat, lon, radius_km):
+    hits = [(haversine_distance(lat, lon, n_lat, n_lon), uid) for _, n_lat, n_lon, uid in ngos]
+    return sorted(h for h in hits if h[0] <= radius_km), len(ngos)
+
+
+def indexed(ngos, hashes, lat, lon, radius_km):
+    hits = []
+    read = 0
+    for cell in covering_cells(lat, lon, radius_km):
+        lo = bisect.bisect_left(hashes, cell)
+        hi = bisect.bisect_left(hashes, cell + GEOHASH_RANGE_END)
+        read += hi - lo
+        for _, n_lat, n_lon, uid in ngos[lo:hi]:
+            dist = haversine_distance(lat, lon, n_lat, n_lon)
+            if dist <= radius_km:
+                hits.append((dist, uid))
+    return sorted(hits), read
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'NGOs':>8} | {'radius':>6} | {'scan ms':>9} | {'geohash ms':>10} | {'docs read scan/geohash':>24} | speedup")
+    for n in SIZES:
+        ngos = make_ngos(n)
+        hashes = [gh for gh, *_ in ngos]
+        for radius in RADII_KM:
+            points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(QUERIES)]
+
+            start = time.perf_counter()
+            scan_read = 0
+            expected = []
+            for lat, lon in points:
+                found, read = scan(ngos, lat, lon, radius)
+                expected.append(found)
+                scan_read += read
+            scan_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+            start = time.perf_counter()
+            index_read = 0
+            for (lat, lon), want in zip(points, expected):
+                found, read = indexed(ngos, hashes, lat, lon, radius)
+                index_read += read
+                assert found == want, "indexed lookup disagrees with full scan"
+            index_ms = (time.perf_counter() - start) * 1000 / QUERIES
+
+            reads = f"{scan_read // QUERIES} / {index_read // QUERIES}"
+            print(f"{n:>8} | {radius:>4.0f}km | {scan_ms:>9.2f} | {index_ms:>10.3f} | {reads:>24} | {scan_ms / index_ms:6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
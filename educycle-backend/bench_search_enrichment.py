@@ -0,0 +1,80 @@
+"""
+Benchmark: donor enrichment latency in search_books vs number of distinct donors.
+
+Compares the old loop (one users/{uid} get per donor, in sequence) with the
+batched field-masked get_all() path used by book_service._fetch_donor_info.
+Seeds synthetic donors under bench-donor-* ids and removes them afterwards.
+
+Usage (point at the emulator or a test project):
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python bench_search_enrichment.py
+"""
+import asyncio
+import sys
+import os
+import time
+
+sys.path.append(os.getcwd())
+
+from app.db.firestore import db, _profile_cache
+from app.services.book_service import _fetch_donor_info
+
+DONOR_COUNTS = [10, 50, 200, 500]
+
+
+async def seed(n):
+    uids = [f"bench-donor-{i}" for i in range(n)]
+    for start in range(0, n, 400):
+        batch = db.batch()
+        for uid in uids[start:start + 400]:
+            batch.set(db.collection("users").document(uid), {
+                "uid": uid,
+                "role": "student",
+                "display_name": f"Donor {uid}",
+                "reputation": 4.5,
+                "mismatch_count": 0,
+                "bio": "x" * 2000,  # payload the field mask should skip
+            })
+        await batch.commit()
+    return uids
+
+
+async def cleanup(uids):
+    for start in range(0, len(uids), 400):
+        batch = db.batch()
+        for uid in uids[start:start + 400]:
+            batch.delete(db.collection("users").document(uid))
+        await batch.commit()
+
+
+async def sequential(uids):
+    out = {}
+    for uid in uids:
+        doc = await db.collection("users").document(uid).get()
+        if doc.exists:
+            out[uid] = doc.to_dict()
+    return out
+
+
+async def main():
+    uids = await seed(max(DONOR_COUNTS))
+    try:
+        print(f"{'donors':>7} | {'sequential':>12} | {'batched':>10} | speedup")
+        for n in DONOR_COUNTS:
+            subset = uids[:n]
+
+            start = time.perf_counter()
+            await sequential(subset)
+            seq_ms = (time.perf_counter() - start) * 1000
+
+            _profile_cache.clear()
+            start = time.perf_counter()
+            await _fetch_donor_info(subset)
+            batched_ms = (time.perf_counter() - start) * 1000
+
+            print(f"{n:>7} | {seq_ms:>9.1f} ms | {batched_ms:>7.1f} ms | {seq_ms / batched_ms:6.1f}x")
+    finally:
+        await cleanup(uids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
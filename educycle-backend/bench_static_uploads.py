@@ -0,0 +1,109 @@
+"""
+Benchmark: /static/uploads served by UploadFiles vs the previous
+StaticFiles mount.
+
+Drives both ASGI apps in-process (no server, so this measures the app's own
+work, not sendfile) over a content-hashed photo and a multi-MB PDF, for the
+requests a browser makes:
+
+  first view      plain GET
+  repeat view     GET with If-None-Match (what a browser sends without
+                  Cache-Control); with `immutable` the browser sends nothing
+  pdf page        Range: bytes=0-1048575 of the PDF, as PDF.js does
+
+Reports status, body bytes and requests/sec for each, plus the
+Cache-Control each mount sends.
+
+Usage:
+    python bench_static_uploads.py [requests] [pdf_mb]
+"""
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.getcwd())
+
+from starlette.staticfiles import StaticFiles
+
+from app.utils.static_files import UploadFiles
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+PDF_MB = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def write_hashed(directory: str, data: bytes, ext: str):
+    name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(data)
+    return name
+
+
+async def request(app, name: str, headers: dict = None):
+    scope = {
+        "type": "http", "method": "GET", "path": f"/static/uploads/{name}",
+        "root_path": "/static/uploads", "query_string": b"", "http_version": "1.1",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    response = {"body": 0}
+    received = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Future()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response
+
+
+async def measure(app, name: str, headers: dict, count: int):
+    first = await request(app, name, headers)
+    start = time.perf_counter()
+    for _ in range(count):
+        await request(app, name, headers)
+    return first, count / (time.perf_counter() - start)
+
+
+async def main():
+    directory = tempfile.mkdtemp()
+    try:
+        photo = write_hashed(directory, os.urandom(180 * 1024), "webp")
+        pdf = write_hashed(directory, os.urandom(PDF_MB * 1024 * 1024), "pdf")
+        mounts = {"StaticFiles": StaticFiles(directory=directory), "UploadFiles": UploadFiles(directory)}
+
+        etags = {label: (await request(app, photo))["headers"]["etag"] for label, app in mounts.items()}
+        scenarios = [
+            ("photo first view", photo, lambda label: {}, REQUESTS),
+            ("photo repeat view", photo, lambda label: {"If-None-Match": etags[label]}, REQUESTS),
+            ("pdf page (1 MiB)", pdf, lambda label: {"Range": "bytes=0-1048575"}, max(REQUESTS // 20, 10)),
+        ]
+
+        print(f"{'scenario':<19} | {'mount':<11} | status | {'body bytes':>10} | {'req/s':>8}")
+        for title, name, headers, count in scenarios:
+            for label, app in mounts.items():
+                first, rate = await measure(app, name, headers(label), count)
+                print(f"{title:<19} | {label:<11} | {first['status']:>6} | {first['body']:>10,} | {rate:>8,.0f}")
+
+        print()
+        for label, app in mounts.items():
+            response = await request(app, photo)
+            print(f"{label:<11} Cache-Control: {response['headers'].get('cache-control', '(none)')}, "
+                  f"ETag: {response['headers']['etag']}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
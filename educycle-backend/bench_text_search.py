@@ -0,0 +1,104 @@
+"""
+Benchmark: TextIndex (BM25 + typo tolerance + prefix completion) on a
+synthetic corpus of book/note titles and descriptions.
+
+Reports build time, memory held by the index, and per-query latency
+(p50 / p95 / p99) for exact, typo'd, prefix and autocomplete queries.
+
+Usage:
+    python bench_text_search.py [documents]
+"""
+import random
+import statistics
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+from app.utils.text_index import TextIndex
+
+DOCS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+QUERIES = 300
+
+PUBLISHERS = ["NCERT", "RD Sharma", "HC Verma", "RS Aggarwal", "Arihant", "S Chand", "Oswaal", "Pradeep", "Cengage", "MTG"]
+SUBJECTS = ["Physics", "Chemistry", "Mathematics", "Biology", "English Grammar", "History", "Geography",
+            "Economics", "Accountancy", "Computer Science", "Political Science", "Hindi", "Sanskrit"]
+KINDS = ["Textbook", "Guide", "Question Bank", "Lab Manual", "Sample Papers", "Notes", "Workbook", "Solutions"]
+WORDS = ("concepts chapter exercises solved examples revision board exam practice previous year questions "
+         "mechanics optics thermodynamics organic inorganic algebra calculus trigonometry genetics ecology "
+         "grammar literature poetry prose mapwork statistics probability electrostatics kinematics").split()
+
+
+def make_doc(rng):
+    subject = rng.choice(SUBJECTS)
+    title = f"{rng.choice(PUBLISHERS)} {subject} {rng.choice(KINDS)} Class {rng.randint(6, 12)}"
+    if rng.random() < 0.3:
+        title += f" Part {rng.randint(1, 2)}"
+    description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 25)))
+    return {"title": title, "description": description}
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]  # drop one letter
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))]
+    return statistics.median(samples), pick(0.95), pick(0.99)
+
+
+def run(label, fn, queries):
+    timings = []
+    hits = 0
+    for query in queries:
+        start = time.perf_counter()
+        result = fn(query)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += len(result)
+    p50, p95, p99 = percentiles(timings)
+    print(f"  {label:<14} p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | p99 {p99:7.2f} ms | avg hits {hits / len(queries):8.0f}")
+
+
+def main():
+    rng = random.Random(15)
+    docs = [make_doc(rng) for _ in range(DOCS)]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    index = TextIndex({"title": 3, "description": 1})
+    for i, doc in enumerate(docs):
+        index.add(f"doc-{i}", doc)
+    build_s = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"Indexed {len(index):,} documents in {build_s:.1f}s, {held / 2**20:.0f} MiB")
+
+    exact = [f"{rng.choice(PUBLISHERS)} {rng.choice(SUBJECTS)} {rng.randint(6, 12)}" for _ in range(QUERIES)]
+    typos = [f"{rng.choice(PUBLISHERS)} {typo(rng.choice(['physics', 'chemistry', 'mathematics', 'biology', 'economics']), rng)}"
+             for _ in range(QUERIES)]
+    prefixes = [f"{rng.choice(PUBLISHERS)} {rng.choice(SUBJECTS)[:rng.randint(2, 4)]}" for _ in range(QUERIES)]
+
+    print(f"Queries ({QUERIES} each), top 20:")
+    run("exact", lambda q: index.search(q, 20), exact)
+    run("typo", lambda q: index.search(q, 20), typos)
+    run("prefix", lambda q: index.search(q, 20), prefixes)
+    run("autocomplete", lambda q: index.complete(q, 10), prefixes)
+
+    sample = index.search("ncert physcs 11", 3)
+    print(f"\n'ncert physcs 11' -> {[docs[int(doc_id.split('-')[1])]['title'] for doc_id, _ in sample]}")
+    print(f"'ncert phy' completions -> {index.complete('ncert phy', 5)}")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        index.add(f"doc-{i}", make_doc(rng))
+        index.remove(f"doc-{i + 1000}")
+    print(f"Incremental update: {(time.perf_counter() - start) * 1000 / 2000:.3f} ms per add/remove")
+
+
+if __name__ == "__main__":
+    main()
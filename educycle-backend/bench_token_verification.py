@@ -0,0 +1,91 @@
+"""
+Microbenchmark: Firebase ID token verifications per second.
+
+Signs tokens with a throwaway RSA key so no network is needed, then compares
+  - "before": a full RS256 signature + claims check on every call, which is what
+    auth.verify_id_token did on the event loop for each request
+  - "after (cold)": FirebaseTokenVerifier.verify on distinct tokens (off-loop crypto)
+  - "after (warm)": repeat verify of the same session token (decoded-token cache hit)
+
+Usage:
+    python bench_token_verification.py [iterations]
+"""
+import asyncio
+import sys
+import os
+import time
+
+sys.path.append(os.getcwd())
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt as google_jwt
+
+from app.core.token_verifier import FirebaseTokenVerifier, ISSUER_PREFIX
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+PROJECT_ID = "educycle-bench"
+KID = "bench-key"
+
+
+def make_keys():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return crypt.RSASigner.from_string(private_pem, key_id=KID), public_pem.decode()
+
+
+def make_token(signer, uid):
+    now = int(time.time())
+    payload = {
+        "iss": ISSUER_PREFIX + PROJECT_ID,
+        "aud": PROJECT_ID,
+        "sub": uid,
+        "iat": now,
+        "exp": now + 3600,
+        "auth_time": now,
+    }
+    return google_jwt.encode(signer, payload).decode()
+
+
+def report(label, count, elapsed):
+    print(f"{label:<14} | {count / elapsed:>10.0f} verifications/s | {elapsed / count * 1e6:>8.1f} us each")
+
+
+async def main():
+    signer, public_pem = make_keys()
+    certs = {KID: public_pem}
+
+    verifier = FirebaseTokenVerifier(PROJECT_ID, cache_size=ITERATIONS * 2)
+    verifier._certs = certs
+    verifier._certs_expire_at = float("inf")
+
+    session_token = make_token(signer, "session-user")
+    distinct_tokens = [make_token(signer, f"user-{i}") for i in range(ITERATIONS)]
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        verifier._verify_signed(session_token, certs)
+    report("before", ITERATIONS, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for token in distinct_tokens:
+        await verifier.verify(token)
+    report("after (cold)", ITERATIONS, time.perf_counter() - start)
+
+    await verifier.verify(session_token)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await verifier.verify(session_token)
+    report("after (warm)", ITERATIONS, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
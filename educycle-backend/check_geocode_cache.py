@@ -0,0 +1,81 @@
+"""
+Check the geocoding cache and Nominatim queue against a local stand-in server.
+
+Starts a tiny HTTP server that answers /search and /reverse like Nominatim and
+counts requests, points NOMINATIM_BASE_URL at it, then verifies that:
+  - a burst of identical lookups makes exactly one upstream request
+  - differently formatted spellings of an address share a cache entry
+  - distinct misses are paced at NOMINATIM_MIN_INTERVAL_SECONDS
+  - reverse lookups are cached per rounded lat/lon
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.getcwd())
+
+hits = {"search": 0, "reverse": 0}
+request_times = []
+
+
+class StandInNominatim(BaseHTTPRequestHandler):
+    def do_GET(self):
+        endpoint = self.path.split("?")[0].strip("/")
+        hits[endpoint] = hits.get(endpoint, 0) + 1
+        request_times.append(time.monotonic())
+        if endpoint == "search":
+            body = [{"lat": "13.0850", "lon": "80.2101"}]
+        else:
+            body = {"display_name": "Anna Nagar, Chennai", "address": {"suburb": "Anna Nagar", "city": "Chennai"}}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+server = ThreadingHTTPServer(("127.0.0.1", 0), StandInNominatim)
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+os.environ["NOMINATIM_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+os.environ["NOMINATIM_MIN_INTERVAL_SECONDS"] = "0.2"
+os.environ["GEOCODE_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "geocode_cache.sqlite3")
+
+from app.services.location_service import geocode_address, reverse_geocode_coordinates
+
+
+async def main():
+    results = await asyncio.gather(*(geocode_address("Anna Nagar, Chennai") for _ in range(50)))
+    assert all(r == (13.085, 80.2101) for r in results), results
+    assert hits["search"] == 1, f"burst made {hits['search']} upstream requests"
+    print("✅ 50 concurrent identical lookups -> 1 upstream request")
+
+    await geocode_address("  anna nagar ,CHENNAI ")
+    assert hits["search"] == 1
+    print("✅ normalized spellings share one cache entry")
+
+    request_times.clear()
+    await asyncio.gather(*(geocode_address(f"Area {i}, Chennai") for i in range(5)))
+    gaps = [b - a for a, b in zip(request_times, request_times[1:])]
+    assert all(gap >= 0.19 for gap in gaps), gaps
+    print(f"✅ distinct misses paced: min gap {min(gaps):.3f}s")
+
+    await reverse_geocode_coordinates(13.08501, 80.21012)
+    await reverse_geocode_coordinates(13.08504, 80.21009)
+    assert hits["reverse"] == 1
+    print("✅ reverse lookups cached per rounded coordinate")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
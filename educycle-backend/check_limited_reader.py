@@ -0,0 +1,66 @@
+"""
+Check: LimitedReader supports the seeks resumable uploads make.
+
+google-resumable-media's ResumableUpload.recover() seeks the stream to the
+bytes the server already has and carries on reading from there. Reads a
+stream in CHUNK_SIZE pieces, seeks back to the middle of it as a recovery
+would, and checks the rest reads identically and the size limit still holds.
+
+Usage:
+    python check_limited_reader.py
+"""
+import io
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+from app.db.storage import LimitedReader
+from app.db.storage_backends import CHUNK_SIZE
+from app.utils.exceptions import UploadTooLarge
+
+PREFIX = b"spooled multipart headers"
+
+
+def report(label: str, ok: bool):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+def main():
+    data = os.urandom(CHUNK_SIZE * 3 + 123)
+    raw = io.BytesIO(PREFIX + data)
+    raw.seek(len(PREFIX))  # the reader starts wherever the stream is
+    reader = LimitedReader(raw, "application/pdf", len(data))
+
+    whole = b"".join(iter(lambda: reader.read(CHUNK_SIZE), b""))
+    middle = len(data) // 2
+    position = reader.seek(middle)
+    rest = reader.read()
+
+    results = [
+        report("full read matches", whole == data),
+        report("seek returns the new position", position == middle),
+        report("reads on from the middle", rest == data[middle:]),
+        report("tell() after the resumed read", reader.tell() == len(data)),
+    ]
+
+    try:
+        reader.seek(len(data) + 1)
+        results.append(report("seek past the limit rejected", False))
+    except ValueError:
+        results.append(report("seek past the limit rejected", True))
+
+    small = LimitedReader(io.BytesIO(data), "application/pdf", middle)
+    small.seek(middle - 10)
+    try:
+        small.read()
+        results.append(report("limit still enforced after a seek", False))
+    except UploadTooLarge:
+        results.append(report("limit still enforced after a seek", True))
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Check: upload latency while the primary storage backend is down.
+
+Runs uploads through FailoverStorage with a primary that fails after
+FAILURE_DELAY seconds (like a Firebase call timing out) and the local disk as
+fallback, once with the circuit breaker effectively disabled (every upload
+waits for the primary to fail, the old behaviour) and once with the
+configured threshold. Then lets the primary recover and shows the background
+probe closing the circuit.
+
+Usage:
+    python check_storage_failover.py [uploads] [failure_delay_seconds]
+"""
+import asyncio
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.db.storage_backends import FailoverStorage, LOCAL_UPLOAD_DIR, LocalBackend, StorageBackend
+
+UPLOADS = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+FAILURE_DELAY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+PROBE_INTERVAL = 0.2
+
+
+class FlakyBackend(StorageBackend):
+    name = "flaky"
+
+    def __init__(self):
+        self.down = True
+
+    def put(self, reader, content_type, digest, overwrite=False):
+        if self.down:
+            time.sleep(FAILURE_DELAY)
+            raise ConnectionError("primary unreachable")
+        return f"flaky://uploads/{digest}", True
+
+    def delete(self, url):
+        pass
+
+    def owns(self, url):
+        return url.startswith("flaky://")
+
+    def probe(self):
+        if self.down:
+            raise ConnectionError("primary unreachable")
+
+
+async def run(label: str, threshold: int):
+    primary = FlakyBackend()
+    storage = FailoverStorage(primary, LocalBackend(), threshold, PROBE_INTERVAL)
+    timings = []
+    urls = set()
+    for i in range(UPLOADS):
+        data = f"check {label} {i}".encode()
+        start = time.perf_counter()
+        url, _ = await storage.put(io.BytesIO(data), "text/plain", f"{i:064x}")
+        timings.append((time.perf_counter() - start) * 1000)
+        urls.add(url)
+
+    print(f"{label:<16} p50 {statistics.median(timings):7.1f} ms | max {max(timings):7.1f} ms | "
+          f"total {sum(timings) / 1000:5.2f} s | failovers {storage.failovers:>3} | "
+          f"short-circuited {storage.short_circuited:>3}")
+
+    primary.down = False
+    await asyncio.sleep(PROBE_INTERVAL * 3)
+    url, _ = await storage.put(io.BytesIO(b"after recovery"), "text/plain", "f" * 64)
+    print(f"{'':<16} after recovery: primary circuit {storage.stats()['primary']['state']}, upload went to {url.split(':')[0]}")
+
+    await storage.stop()
+    for url in urls:
+        if url.startswith("http"):
+            os.remove(os.path.join(LOCAL_UPLOAD_DIR, url.rsplit("/", 1)[-1]))
+
+
+async def main():
+    print(f"{UPLOADS} uploads, primary fails after {FAILURE_DELAY * 1000:.0f} ms:")
+    await run("no breaker", UPLOADS + 1)
+    await run(f"threshold {settings.STORAGE_FAILURE_THRESHOLD}", settings.STORAGE_FAILURE_THRESHOLD)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""
+Check: a stored object lives until the last document that holds it is deleted.
+
+  notes   the same bytes uploaded as two notes share one URL and take two
+          references; deleting the first note must leave the object, deleting
+          the second must remove it and its storage_refs record
+  photo   an image Pillow can't decode is stored once under all three variant
+          names, which must take (and later release) three references
+
+Stores objects on the local backend so the check can look at the files; the
+reference records live in the configured Firestore project.
+
+Usage:
+    python check_storage_refs.py
+"""
+import asyncio
+import os
+import sys
+import uuid
+
+sys.path.append(os.getcwd())
+
+from app.db import storage
+from app.db.firestore import db
+from app.db.storage_backends import LOCAL_UPLOAD_DIR, FailoverStorage, LocalBackend
+from app.services.note_service import delete_note, upload_note
+
+UID = "check-storage-refs"
+
+
+def on_disk(url: str) -> bool:
+    return os.path.exists(os.path.join(LOCAL_UPLOAD_DIR, url.rsplit("/", 1)[-1]))
+
+
+async def refs(url: str):
+    doc = await db.collection("storage_refs").document(storage._digest(url)).get()
+    return doc.to_dict()["refs"] if doc.exists else None
+
+
+def report(label: str, ok: bool):
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+async def check_notes():
+    print("notes:")
+    data = f"check_storage_refs {uuid.uuid4()}".encode()
+    first_url = await storage.upload_file(data, "notes", "application/pdf")
+    second_url = await storage.upload_file(data, "notes", "application/pdf")
+    first = await upload_note(UID, {"title": "check 1"}, first_url)
+    second = await upload_note(UID, {"title": "check 2"}, second_url)
+
+    results = [
+        report("identical uploads share a URL", first_url == second_url),
+        report("two references taken", await refs(first_url) == 2),
+    ]
+    await delete_note(first, UID)
+    results += [
+        report("object kept after the first delete", on_disk(first_url)),
+        report("one reference left", await refs(first_url) == 1),
+    ]
+    await delete_note(second, UID)
+    results += [
+        report("object removed after the last delete", not on_disk(first_url)),
+        report("reference record removed", await refs(first_url) is None),
+    ]
+    return all(results)
+
+
+async def check_photo():
+    print("photo:")
+    variants = await storage.upload_image(f"not an image {uuid.uuid4()}".encode(), "books")
+    url = variants["full"]
+    results = [
+        report("one object under every variant name", len(set(variants.values())) == 1),
+        report("a reference per variant", await refs(url) == len(variants)),
+    ]
+    await storage.delete_files(storage.stored_file_urls({"image_variants": [variants]}))
+    results += [
+        report("object removed once every variant is released", not on_disk(url)),
+        report("reference record removed", await refs(url) is None),
+    ]
+    return all(results)
+
+
+async def main():
+    storage.storage_backends = FailoverStorage(LocalBackend(), None, threshold=1, probe_interval=1.0)
+    ok = all([await check_notes(), await check_photo()])
+    storage.shutdown_image_pool()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
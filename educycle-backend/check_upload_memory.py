@@ -0,0 +1,95 @@
+"""
+Check: peak RSS of an upload stays flat as the file grows.
+
+Each (mode, size) runs in a fresh subprocess that spools a synthetic file to
+a temp file the way Starlette does for multipart uploads, stores it, and
+reports its peak RSS (ru_maxrss):
+
+  legacy     await file.read() + write the whole bytes object (the old path)
+  streaming  hash pass + chunked copy through LimitedReader, local backend
+  firebase   upload_file(UploadFile) against the configured bucket (opt-in)
+
+Usage:
+    python check_upload_memory.py [--firebase]
+"""
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.getcwd())
+
+SIZES_MB = [1, 5, 20, 50]
+BLOCK = os.urandom(256 * 1024)
+
+
+def spooled_file(size_mb: int):
+    # Same spooling threshold Starlette uses for multipart parts (1 MB)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    for _ in range(size_mb * 4):
+        spool.write(BLOCK)
+    spool.seek(0)
+    return spool
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+async def child(mode: str, size_mb: int):
+    from starlette.datastructures import Headers, UploadFile
+    from app.db import storage
+    from app.db.storage_backends import LOCAL_UPLOAD_DIR, LocalBackend
+    from app.utils.exceptions import UploadTooLarge
+
+    spool = spooled_file(size_mb)
+    upload = UploadFile(spool, size=size_mb * 1024 * 1024, filename="check.bin",
+                        headers=Headers({"content-type": "application/octet-stream"}))
+    # Large enough for every size in this check
+    limit = (max(SIZES_MB) + 1) * 1024 * 1024
+    baseline = peak_rss_mb()
+
+    if mode == "legacy":
+        data = await upload.read()
+        path = os.path.join(LOCAL_UPLOAD_DIR, "check_legacy.bin")
+        os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        os.remove(path)
+    elif mode == "streaming":
+        reader = storage.LimitedReader(upload.file, "application/octet-stream", limit)
+        digest, _ = await asyncio.to_thread(storage._hash_stream, reader)
+        url, _ = await asyncio.to_thread(LocalBackend().put, reader, "application/octet-stream", digest)
+        os.remove(os.path.join(LOCAL_UPLOAD_DIR, url.rsplit("/", 1)[-1]))
+    else:
+        storage.max_upload_bytes = lambda content_type: limit
+        try:
+            print(f"   uploaded {await storage.upload_file(upload, 'checks')}", file=sys.stderr)
+        except UploadTooLarge as e:
+            print(f"   {e}", file=sys.stderr)
+
+    print(f"{peak_rss_mb() - baseline:.1f}")
+
+
+def main():
+    modes = ["legacy", "streaming"] + (["firebase"] if "--firebase" in sys.argv else [])
+    print(f"{'size':>6} | " + " | ".join(f"{m + ' peak ΔRSS':>20}" for m in modes))
+    for size_mb in SIZES_MB:
+        cells = []
+        for mode in modes:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(size_mb)],
+                capture_output=True, text=True, check=True,
+            )
+            cells.append(f"{float(out.stdout.strip()):>17.1f} MB")
+        print(f"{size_mb:>4}MB | " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        asyncio.run(child(sys.argv[2], int(sys.argv[3])))
+    else:
+        main()